@@ -0,0 +1,194 @@
+"""
+Versão assíncrona do módulo `database`.
+
+As funções de `database.py` usam o cliente síncrono do Supabase; chamá-las direto
+de uma cog trava o event loop do discord.py (inclusive o heartbeat do gateway)
+durante toda a requisição HTTP. Este módulo expõe a mesma API como corrotinas,
+executadas em um pool de threads dedicado e limitado. As verificações de plano
+(`_check_plan_access`) continuam sendo feitas pelas funções originais.
+
+Exemplo:
+    from async_database import add_data, find_data
+    await add_data('warns', {'user_id': '123', 'reason': 'spam'})
+    warns = await find_data('warns', 'user_id', '123')
+"""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional, List, Dict
+
+import database
+# Funções que só mexem em estado local não precisam de thread
+from database import DatabaseAccessError, declare_index, refresh_replica
+
+# API pública: as corrotinas abaixo e os nomes reexportados de `database`
+__all__ = [
+    'DatabaseAccessError', 'declare_index', 'refresh_replica', 'shutdown', 'get_database',
+    'create_database', 'get_or_create_database', 'get_all_data', 'add_data', 'update_data',
+    'delete_data', 'find_data', 'find_index', 'clear_database', 'count_data', 'exists',
+    'delete_by_key', 'delete_all_by_key', 'modify_by_key', 'update_by_key', 'upsert_data',
+    'add_many', 'update_many', 'delete_many_by_key', 'list_databases', 'delete_database',
+    'migrate_to_rows', 'get_plan_info',
+]
+
+# Pool dedicado: as chamadas bloqueantes não competem com o executor padrão do loop
+_MAX_WORKERS = int(os.getenv('DATABASE_MAX_WORKERS', 4))
+_executor = ThreadPoolExecutor(max_workers=_MAX_WORKERS, thread_name_prefix='verlia-db')
+
+async def _run(func, *args, **kwargs):
+    """Executa uma função síncrona de `database` no pool dedicado."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+def shutdown(wait: bool = True):
+    """
+    Encerra o pool de threads (chamar no desligamento do bot).
+    """
+    _executor.shutdown(wait=wait)
+
+async def get_database(name: str) -> Optional[Dict]:
+    """
+    Obtém um banco de dados pelo nome.
+    """
+    return await _run(database.get_database, name)
+
+async def create_database(name: str) -> Optional[Dict]:
+    """
+    Cria um novo banco de dados para o bot.
+    """
+    return await _run(database.create_database, name)
+
+async def get_or_create_database(name: str) -> Optional[Dict]:
+    """
+    Obtém um banco de dados existente ou cria um novo.
+    """
+    return await _run(database.get_or_create_database, name)
+
+async def get_all_data(db_name: str) -> List[Dict]:
+    """
+    Obtém todos os dados de um banco de dados.
+    """
+    return await _run(database.get_all_data, db_name)
+
+async def add_data(db_name: str, item: Dict) -> bool:
+    """
+    Adiciona um item ao banco de dados (respeita os limites do plano).
+    """
+    return await _run(database.add_data, db_name, item)
+
+async def update_data(db_name: str, index: int, item: Dict) -> bool:
+    """
+    Atualiza um item no banco de dados pelo índice.
+    """
+    return await _run(database.update_data, db_name, index, item)
+
+async def delete_data(db_name: str, index: int) -> bool:
+    """
+    Remove um item do banco de dados pelo índice.
+    """
+    return await _run(database.delete_data, db_name, index)
+
+async def find_data(db_name: str, key: str, value: Any) -> List[Dict]:
+    """
+    Busca itens que correspondem a um critério.
+    """
+    return await _run(database.find_data, db_name, key, value)
+
+async def find_index(db_name: str, key: str, value: Any) -> int:
+    """
+    Encontra o índice do primeiro item que corresponde ao critério (-1 se não encontrado).
+    """
+    return await _run(database.find_index, db_name, key, value)
+
+async def clear_database(db_name: str) -> bool:
+    """
+    Limpa todos os dados de um banco de dados.
+    """
+    return await _run(database.clear_database, db_name)
+
+async def count_data(db_name: str) -> int:
+    """
+    Conta quantos registros existem no banco de dados.
+    """
+    return await _run(database.count_data, db_name)
+
+async def exists(db_name: str, key: str, value: Any) -> bool:
+    """
+    Verifica se existe um item com a chave/valor especificados.
+    """
+    return await _run(database.exists, db_name, key, value)
+
+async def delete_by_key(db_name: str, key: str, value: Any) -> bool:
+    """
+    Deleta o primeiro item que corresponde à chave/valor.
+    """
+    return await _run(database.delete_by_key, db_name, key, value)
+
+async def delete_all_by_key(db_name: str, key: str, value: Any) -> int:
+    """
+    Deleta TODOS os itens que correspondem à chave/valor.
+    """
+    return await _run(database.delete_all_by_key, db_name, key, value)
+
+async def modify_by_key(db_name: str, key: str, value: Any, func) -> bool:
+    """
+    Lê, aplica `func(item_atual | None)` e grava com compare-and-swap (seguro para contadores).
+    `func` roda na thread do pool: não deve ser uma corrotina.
+    """
+    return await _run(database.modify_by_key, db_name, key, value, func)
+
+async def update_by_key(db_name: str, key: str, value: Any, new_item: Dict) -> bool:
+    """
+    Atualiza o primeiro item que corresponde à chave/valor.
+    """
+    return await _run(database.update_by_key, db_name, key, value, new_item)
+
+async def upsert_data(db_name: str, key: str, value: Any, item: Dict) -> bool:
+    """
+    Atualiza se existir, insere se não existir (upsert).
+    """
+    return await _run(database.upsert_data, db_name, key, value, item)
+
+async def add_many(db_name: str, items: List[Dict]) -> bool:
+    """
+    Adiciona vários itens em uma única escrita.
+    """
+    return await _run(database.add_many, db_name, items)
+
+async def update_many(db_name: str, key: str, items: List[Dict]) -> int:
+    """
+    Substitui vários itens (pelo valor de `key`) em uma única escrita.
+    """
+    return await _run(database.update_many, db_name, key, items)
+
+async def delete_many_by_key(db_name: str, key: str, values: List[Any]) -> int:
+    """
+    Deleta todos os itens cujo valor em `key` esteja na lista, em uma única escrita.
+    """
+    return await _run(database.delete_many_by_key, db_name, key, values)
+
+async def list_databases() -> List[str]:
+    """
+    Lista todos os bancos de dados do bot.
+    """
+    return await _run(database.list_databases)
+
+async def delete_database(db_name: str) -> bool:
+    """
+    Deleta completamente um banco de dados.
+    """
+    return await _run(database.delete_database, db_name)
+
+async def migrate_to_rows(db_name: str) -> bool:
+    """
+    Move os itens do array JSON de um banco para a tabela de linhas (modo 'rows').
+    """
+    return await _run(database.migrate_to_rows, db_name)
+
+async def get_plan_info() -> Dict:
+    """
+    Retorna informações sobre o plano atual e seus limites.
+    """
+    return await _run(database.get_plan_info)
@@ -1,11 +1,14 @@
 import discord
 import logging
 import re
-from config import SUCCESS_COLOR, WARNING_COLOR
+from config import SUCCESS_COLOR, ERROR_COLOR, WARNING_COLOR
 from datetime import datetime
 from discord.ext import commands
-from utils.database import db
+from utils.cache import settings_cache
+from utils.coalescer import EditCoalescer
 from utils.embeds import info
+from utils.message_store import StoredMessage, message_store
+from utils.mod_logs import bulk_delete_log, mod_logs
 
 """Eventos do Bot (on_member_join, on_member_remove)"""
 
@@ -15,21 +18,25 @@ class Events(commands.Cog):
     """Classe Events."""
     def __init__(self, bot):
         self.bot = bot
+        self.edit_coalescer = EditCoalescer(self._log_edit)
     
-    async def _log_event(self, guild: discord.Guild, embed: discord.Embed):
-        """Envia um embed para o canal de logs de moderação da guilda, se configurado."""
-        settings = await db.get_one("guild_settings", {"guild_id": str(guild.id)})
-        if settings and settings.get("mod_logs_channel_id"):
-            channel_id = int(settings["mod_logs_channel_id"])
-            channel = guild.get_channel(channel_id)
-            if channel and isinstance(channel, discord.TextChannel):
-                try:
-                    await channel.send(embed=embed)
-                except discord.Forbidden:
-                    log.warning(f"Não tenho permissão para enviar logs no canal '{channel.name}' ({channel.id}) da guilda '{guild.name}' ({guild.id}).")
-            else:
-                log.warning(f"Canal de logs {channel_id} não é um canal de texto ou não existe na guilda '{guild.name}' ({guild.id}).")
+    async def cog_unload(self):
+        # Registra as edições que ainda aguardavam o fim da janela
+        await self.edit_coalescer.flush()
     
+    async def _log_event(self, guild: discord.Guild, embed: discord.Embed, attachment=None):
+        """Enfileira um embed para o canal de logs de moderação da guilda, se configurado (enviado em lote)."""
+        await mod_logs.send(guild, embed, attachment)
+    
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild: discord.Guild):
+        # Carrega as configurações da nova guilda (ela pode já ter sido configurada antes)
+        await settings_cache.refresh(guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        settings_cache.invalidate(guild.id)
+
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
         if member.guild.system_channel:
@@ -74,55 +81,123 @@ class Events(commands.Cog):
         await self._log_event(member.guild, mod_log_embed)
 
     @commands.Cog.listener()
-    async def on_message_edit(self, before: discord.Message, after: discord.Message):
-        # Ignora mensagens de bots e DMs
-        if before.author.bot or not before.guild:
+    async def on_message(self, message: discord.Message):
+        # Guarda o conteúdo das mensagens para os logs de edição e exclusão
+        if message.author.bot or not message.guild or not isinstance(message.channel, discord.TextChannel):
+            return
+        message_store.add(StoredMessage.from_message(message))
+
+    def _stored_message(self, message_id: int, cached_message: discord.Message = None) -> StoredMessage:
+        """Registro da mensagem no armazenamento compacto ou, na falta dele, no cache do discord.py."""
+        record = message_store.get(message_id)
+        if record is None and cached_message is not None and not cached_message.author.bot and isinstance(cached_message.channel, discord.TextChannel):
+            record = StoredMessage.from_message(cached_message)
+        return record
+
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        # Ignora DMs e atualizações sem conteúdo (ex.: embeds de links sendo carregados)
+        if payload.guild_id is None or "content" not in payload.data:
             return
         
-        # Ignora se o conteúdo não mudou ou se não é um canal de texto
-        if before.content == after.content or not isinstance(before.channel, discord.TextChannel):
+        # Só mensagens conhecidas (o armazenamento já ignora bots e canais que não são de texto)
+        before = self._stored_message(payload.message_id, payload.cached_message)
+        if before is None:
             return
+        after = before.with_content(payload.data["content"])
+        if before.content == after.content:
+            return
+        message_store.add(after)
+
+        # Edições seguidas da mesma mensagem geram um único log (ver _log_edit)
+        self.edit_coalescer.add(before, after)
 
+    async def _log_edit(self, before: StoredMessage, after: StoredMessage, edits: int):
+        """Registra a primeira e a última versão de uma mensagem editada."""
+        guild = self.bot.get_guild(before.guild_id)
+        if guild is None:
+            return
         embed = discord.Embed(
             title="✏️ Mensagem Editada",
-            description=(f"**Autor:** {before.author.mention} (`{before.author.id}`)\n"
-                         f"**Canal:** {before.channel.mention}\n"
+            description=(f"**Autor:** {before.author_mention} (`{before.author_id}`)\n"
+                         f"**Canal:** {before.channel_mention}\n"
                          f"[Ir para a mensagem]({after.jump_url})"),
             color=WARNING_COLOR,
             timestamp=datetime.utcnow()
         )
-        embed.add_field(name="Antes", value=discord.utils.escape_markdown(before.content[:1020]), inline=False)
-        embed.add_field(name="Depois", value=discord.utils.escape_markdown(after.content[:1020]), inline=False)
-        embed.set_footer(text=f"ID da Mensagem: {after.id}")
-        embed.set_thumbnail(url=before.author.display_avatar.url)
-        await self._log_event(before.guild, embed)
+        embed.add_field(name="Antes", value=discord.utils.escape_markdown(before.content[:1020]) or "*(vazio)*", inline=False)
+        embed.add_field(name="Depois", value=discord.utils.escape_markdown(after.content[:1020]) or "*(vazio)*", inline=False)
+        footer = f"ID da Mensagem: {after.id}"
+        if edits > 1:
+            footer += f" • {edits} edições"
+        embed.set_footer(text=footer)
+        member = guild.get_member(before.author_id)
+        if member:
+            embed.set_thumbnail(url=member.display_avatar.url)
+        await self._log_event(guild, embed)
 
     @commands.Cog.listener()
-    async def on_message_delete(self, message: discord.Message):
-        # Ignora mensagens de bots e DMs
-        if message.author.bot or not message.guild:
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        # Ignora DMs
+        if payload.guild_id is None:
+            return
+        
+        # Ignora mensagens já registradas em um log agregado (ex.: /clear)
+        if mod_logs.is_suppressed(payload.message_id):
+            message_store.pop(payload.message_id)
             return
         
-        # Ignora se não é um canal de texto
-        if not isinstance(message.channel, discord.TextChannel):
+        message = self._stored_message(payload.message_id, payload.cached_message)
+        message_store.pop(payload.message_id)
+        guild = self.bot.get_guild(payload.guild_id)
+        if message is None or guild is None:
             return
 
         embed = discord.Embed(
             title="🗑️ Mensagem Deletada",
-            description=(f"**Autor:** {message.author.mention} (`{message.author.id}`)\n"
-                         f"**Canal:** {message.channel.mention}"),
+            description=(f"**Autor:** {message.author_mention} (`{message.author_id}`)\n"
+                         f"**Canal:** {message.channel_mention}"),
             color=ERROR_COLOR,
             timestamp=datetime.utcnow()
         )
         if message.content:
             embed.add_field(name="Conteúdo", value=discord.utils.escape_markdown(message.content[:1020]), inline=False)
         if message.attachments:
-            attachments_str = "\n".join([f"[{attachment.filename}]({attachment.url})" for attachment in message.attachments])
+            attachments_str = "\n".join([f"[{url.rsplit('/', 1)[-1].split('?', 1)[0]}]({url})" for url in message.attachments])
             embed.add_field(name="Anexos", value=attachments_str[:1020], inline=False)
 
         embed.set_footer(text=f"ID da Mensagem: {message.id}")
-        embed.set_thumbnail(url=message.author.display_avatar.url)
-        await self._log_event(message.guild, embed)
+        member = guild.get_member(message.author_id)
+        if member:
+            embed.set_thumbnail(url=member.display_avatar.url)
+        await self._log_event(guild, embed)
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        """Registra uma exclusão em massa com um único log, em vez de um por mensagem."""
+        if payload.guild_id is None:
+            return
+        
+        # Ignora mensagens já registradas pelo /clear
+        message_ids = {message_id for message_id in payload.message_ids if not mod_logs.is_suppressed(message_id)}
+        if not message_ids:
+            return
+        mod_logs.suppress(message_ids)
+        
+        guild = self.bot.get_guild(payload.guild_id)
+        channel = guild.get_channel(payload.channel_id) if guild else None
+        if not isinstance(channel, discord.TextChannel):
+            return
+        
+        cached = {message.id: message for message in payload.cached_messages}
+        messages = []
+        for message_id in message_ids:
+            record = self._stored_message(message_id, cached.get(message_id))
+            message_store.pop(message_id)
+            if record is not None:
+                messages.append(record)
+        embed, attachment = bulk_delete_log(channel, messages, len(message_ids))
+        await self._log_event(guild, embed, attachment)
 
 async def setup(bot):
     await bot.add_cog(Events(bot))
\ No newline at end of file
@@ -7,29 +7,24 @@ from discord import app_commands
 from discord.ext import commands
 from utils.database import db
 from utils.embeds import success, error, warning, info
+from utils.message_store import StoredMessage, message_store
+from utils.mod_logs import bulk_delete_log, mod_logs
 
 """Comandos de Moderação do Bot"""
 
 log = logging.getLogger('bot')
 
+# Limite de campos por embed imposto pelo Discord
+MAX_EMBED_FIELDS = 25
+
 class Moderation(commands.Cog):
     """Classe Moderation."""
     def __init__(self, bot):
         self.bot = bot
     
-    async def _send_mod_log(self, guild: discord.Guild, embed: discord.Embed):
-        """Envia um embed para o canal de logs de moderação da guilda."""
-        settings = await db.get_one("guild_settings", {"guild_id": str(guild.id)})
-        if settings and settings.get("mod_logs_channel_id"):
-            channel_id = int(settings["mod_logs_channel_id"])
-            channel = guild.get_channel(channel_id)
-            if channel and isinstance(channel, discord.TextChannel):
-                try:
-                    await channel.send(embed=embed)
-                except discord.Forbidden:
-                    log.warning(f"Não tenho permissão para enviar logs no canal {channel.name} ({channel.id}) da guilda {guild.name} ({guild.id}).")
-            else:
-                log.warning(f"Canal de logs {channel_id} não é um canal de texto ou não existe na guilda {guild.name} ({guild.id}).")
+    async def _send_mod_log(self, guild: discord.Guild, embed: discord.Embed, attachment=None):
+        """Enfileira um embed para o canal de logs de moderação da guilda (enviado em lote)."""
+        await mod_logs.send(guild, embed, attachment)
     
     @app_commands.command(name="ban", description="Bane um usuário do servidor.")
     @app_commands.checks.has_permissions(ban_members=True)
@@ -130,13 +125,15 @@ class Moderation(commands.Cog):
         
         try:
             await user.timeout(ends_at, reason=reason)
-            await db.save("mutes", {
+            mute_record = {
                 "user_id": str(user.id),
                 "guild_id": str(interaction.guild.id),
                 "moderator_id": str(interaction.user.id),
                 "reason": reason,
                 "ends_at": ends_at.timestamp() # Armazena o timestamp para fácil comparação
-            })
+            }
+            await db.save("mutes", mute_record)
+            self.bot.mute_scheduler.schedule(mute_record)
             
             mute_embed = warning("Usuário Mutado", f"**Usuário:** {user.mention} (`{user.id}`)\n**Duração:** {duration_minutes} minutos\n**Motivo:** {reason}\n**Moderador:** {interaction.user.mention}")
             mute_embed.set_thumbnail(url=user.display_avatar.url)
@@ -158,6 +155,7 @@ class Moderation(commands.Cog):
         try:
             await user.timeout(None, reason=reason) # Removendo o timeout
             await db.delete("mutes", {"user_id": str(user.id), "guild_id": str(interaction.guild.id)})
+            self.bot.mute_scheduler.cancel(interaction.guild.id, user.id)
             
             unmute_embed = success("Usuário Desmutado", f"**Usuário:** {user.mention} (`{user.id}`)\n**Motivo:** {reason}\n**Moderador:** {interaction.user.mention}")
             unmute_embed.set_thumbnail(url=user.display_avatar.url)
@@ -179,16 +177,20 @@ class Moderation(commands.Cog):
         # Obter warns existentes
         all_warns = await db.get("warns", {"user_id": str(user.id), "guild_id": str(interaction.guild.id)})
         current_warn_count = len(all_warns) + 1
+        punishment_info = PUNISHMENT_LEVELS.get(current_warn_count)
         
-        # Salvar a nova advertência
-        await db.save("warns", {
+        warn_record = {
             "user_id": str(user.id),
             "guild_id": str(interaction.guild.id),
             "reason": reason,
             "moderator_id": str(interaction.user.id),
             "count": current_warn_count,
             "punishment_level": None # Será preenchido se uma punição automática for aplicada
-        })
+        }
+        
+        # Salvar a nova advertência (com punição automática, ela é gravada junto com a punição)
+        if punishment_info is None:
+            await db.save("warns", warn_record)
         
         warn_embed = warning(f"Advertência #{current_warn_count}", 
                              f"**Usuário:** {user.mention} (`{user.id}`)\n**Motivo:** {reason}\n**Moderador:** {interaction.user.mention}")
@@ -196,33 +198,39 @@ class Moderation(commands.Cog):
         await interaction.response.send_message(embed=warn_embed)
         await self._send_mod_log(interaction.guild, warn_embed)
 
-        # Verificar níveis de punição automática
-        for warn_threshold, punishment_info in PUNISHMENT_LEVELS.items():
-            if current_warn_count == warn_threshold:
-                action = punishment_info["action"]
-                duration = punishment_info.get("duration") # duration em segundos
-                
-                punishment_reason = f"Punição automática: {warn_threshold} advertências."
-                punishment_embed = None
-                
-                if action == "mute":
-                    if user.top_role >= interaction.guild.me.top_role:
-                        await interaction.followup.send(embed=error("Punição Automática Falhou", f"Não foi possível mutar {user.mention} (cargo igual ou superior ao meu)."), ephemeral=True)
-                        punishment_embed = error("Punição Automática Falhou", f"Não foi possível mutar {user.mention}. Cargo do bot inferior.")
-                        break
-                    
+        # Verificar níveis de punição automática (apenas uma punição por vez por atingir o limite)
+        if punishment_info is None:
+            return
+        
+        action = punishment_info["action"]
+        duration = punishment_info.get("duration") # duration em segundos
+        
+        punishment_reason = f"Punição automática: {current_warn_count} advertências."
+        punishment_embed = None
+        # Advertência e registro da punição vão para o DB em uma única requisição
+        pipeline = db.pipeline()
+        
+        # O registro é gravado mesmo que algum followup falhe (ex.: interação expirada)
+        try:
+            if action == "mute":
+                if user.top_role >= interaction.guild.me.top_role:
+                    await interaction.followup.send(embed=error("Punição Automática Falhou", f"Não foi possível mutar {user.mention} (cargo igual ou superior ao meu)."), ephemeral=True)
+                    punishment_embed = error("Punição Automática Falhou", f"Não foi possível mutar {user.mention}. Cargo do bot inferior.")
+                else:
                     ends_at = datetime.utcnow() + timedelta(seconds=duration)
                     try:
                         await user.timeout(ends_at, reason=punishment_reason)
-                        await db.save("mutes", {
+                        warn_record["punishment_level"] = "MUTE"
+                        mute_record = {
                             "user_id": str(user.id),
                             "guild_id": str(interaction.guild.id),
                             "moderator_id": str(self.bot.user.id), # Bot como moderador
                             "reason": punishment_reason,
                             "ends_at": ends_at.timestamp()
-                        })
-                        await db.update("warns", {"user_id": str(user.id), "guild_id": str(interaction.guild.id), "count": current_warn_count}, {"punishment_level": "MUTE"})
-                        
+                        }
+                        pipeline.save("mutes", mute_record)
+                        self.bot.mute_scheduler.schedule(mute_record)
+                    
                         punishment_embed = warning("Punição Automática Aplicada: Mute", 
                                                    f"**Usuário:** {user.mention} (`{user.id}`)\n**Motivo:** {punishment_reason}\n**Duração:** {duration // 60} minutos.")
                         punishment_embed.set_thumbnail(url=user.display_avatar.url)
@@ -233,23 +241,22 @@ class Moderation(commands.Cog):
                     except Exception as e:
                         await interaction.followup.send(embed=error("Punição Automática Falhou", f"Erro ao mutar {user.mention} automaticamente: `{e}`"), ephemeral=True)
                         punishment_embed = error("Punição Automática Falhou", f"Erro ao mutar {user.mention}: `{e}`")
-                        
-                elif action == "ban":
-                    if user.top_role >= interaction.guild.me.top_role:
-                        await interaction.followup.send(embed=error("Punição Automática Falhou", f"Não foi possível banir {user.mention} (cargo igual ou superior ao meu)."), ephemeral=True)
-                        punishment_embed = error("Punição Automática Falhou", f"Não foi possível banir {user.mention}. Cargo do bot inferior.")
-                        break
-                    
+                
+            elif action == "ban":
+                if user.top_role >= interaction.guild.me.top_role:
+                    await interaction.followup.send(embed=error("Punição Automática Falhou", f"Não foi possível banir {user.mention} (cargo igual ou superior ao meu)."), ephemeral=True)
+                    punishment_embed = error("Punição Automática Falhou", f"Não foi possível banir {user.mention}. Cargo do bot inferior.")
+                else:
                     try:
                         await user.ban(reason=punishment_reason)
-                        await db.save("bans", {
+                        warn_record["punishment_level"] = "BAN"
+                        pipeline.save("bans", {
                             "user_id": str(user.id),
                             "guild_id": str(interaction.guild.id),
                             "reason": punishment_reason,
                             "moderator_id": str(self.bot.user.id) # Bot como moderador
                         })
-                        await db.update("warns", {"user_id": str(user.id), "guild_id": str(interaction.guild.id), "count": current_warn_count}, {"punishment_level": "BAN"})
-                        
+                    
                         punishment_embed = error("Punição Automática Aplicada: Banimento", 
                                                   f"**Usuário:** {user.mention} (`{user.id}`)\n**Motivo:** {punishment_reason}")
                         punishment_embed.set_thumbnail(url=user.display_avatar.url)
@@ -260,26 +267,28 @@ class Moderation(commands.Cog):
                     except Exception as e:
                         await interaction.followup.send(embed=error("Punição Automática Falhou", f"Erro ao banir {user.mention} automaticamente: `{e}`"), ephemeral=True)
                         punishment_embed = error("Punição Automática Falhou", f"Erro ao banir {user.mention}: `{e}`")
-                        
-                if punishment_embed:
-                    await self._send_mod_log(interaction.guild, punishment_embed)
+        finally:
+            pipeline.save("warns", warn_record)
+            await pipeline.execute()
                 
-                break # Apenas uma punição por vez por atingir o limite
+        if punishment_embed:
+            await self._send_mod_log(interaction.guild, punishment_embed)
 
     @app_commands.command(name="warns", description="Exibe as advertências de um usuário.")
     async def warns_list(self, interaction: discord.Interaction, user: discord.Member):
-        warns = await db.get("warns", {"user_id": str(user.id), "guild_id": str(interaction.guild.id)})
+        warn_filters = {"user_id": str(user.id), "guild_id": str(interaction.guild.id)}
+        warns_count = await db.count("warns", warn_filters)
         
-        if not warns:
+        if not warns_count:
             return await interaction.response.send_message(embed=info("Sem Advertências", f"{user.mention} não possui advertências neste servidor."), ephemeral=True)
         
-        warns_embed = warning(f"Advertências de {user.display_name}", f"Total de advertências: `{len(warns)}`")
+        warns_embed = warning(f"Advertências de {user.display_name}", f"Total de advertências: `{warns_count}`")
         warns_embed.set_thumbnail(url=user.display_avatar.url)
         
-        # Ordenar as advertências pela contagem
-        warns_sorted = sorted(warns, key=lambda x: x.get('count', 0))
-
-        for warn_data in warns_sorted:
+        # Percorre as advertências em ordem de criação, sem carregar o histórico inteiro
+        async for warn_data in db.iter("warns", warn_filters, page_size=MAX_EMBED_FIELDS, order_by="created_at"):
+            if len(warns_embed.fields) >= MAX_EMBED_FIELDS:
+                break
             moderator = interaction.guild.get_member(int(warn_data["moderator_id"])) or "Desconhecido"
             punishment = warn_data.get("punishment_level", "Nenhuma")
             warns_embed.add_field(
@@ -321,10 +330,19 @@ class Moderation(commands.Cog):
         try:
             # +1 para incluir a própria mensagem de comando após a resposta
             await interaction.response.send_message("Limpeza de mensagens em andamento...", ephemeral=True)
-            deleted = await interaction.channel.purge(limit=amount, check=lambda m: not m.pinned) # Não apaga mensagens fixadas
             
-            clear_embed = info("Mensagens Limpas", f"🗑️ `{len(deleted)}` mensagens foram apagadas por {interaction.user.mention} no canal {interaction.channel.mention}.")
-            await self._send_mod_log(interaction.guild, clear_embed)
+            def check(message: discord.Message) -> bool:
+                if message.pinned: # Não apaga mensagens fixadas
+                    return False
+                # Este /clear registra a exclusão em um único log; os eventos de cada mensagem são ignorados
+                mod_logs.suppress([message.id])
+                return True
+            
+            deleted = await interaction.channel.purge(limit=amount, check=check)
+            
+            records = [message_store.pop(m.id) or StoredMessage.from_message(m) for m in deleted]
+            clear_embed, attachment = bulk_delete_log(interaction.channel, records, len(deleted), moderator=interaction.user)
+            await self._send_mod_log(interaction.guild, clear_embed, attachment)
             
             await interaction.edit_original_response(content="", embed=success("Limpeza Completa", f"🗑️ `{len(deleted)}` mensagens apagadas neste canal."))
             
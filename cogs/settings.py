@@ -3,6 +3,7 @@ import logging
 from config import SUCCESS_COLOR, ERROR_COLOR
 from discord import app_commands
 from discord.ext import commands
+from utils.cache import settings_cache
 from utils.database import db
 from utils.embeds import success, error, info
 
@@ -10,34 +11,63 @@ from utils.embeds import success, error, info
 
 log = logging.getLogger('bot')
 
+# Nome do webhook criado (ou reutilizado) para os logs de moderação
+MOD_LOG_WEBHOOK_NAME = "Verl.ia Logs"
+
 class Settings(commands.Cog):
     """Classe Settings."""
     def __init__(self, bot):
         self.bot = bot
 
+    async def _get_log_webhook(self, channel: discord.TextChannel) -> discord.Webhook:
+        """Reutiliza o webhook de logs do bot no canal ou cria um novo."""
+        for webhook in await channel.webhooks():
+            if webhook.user == channel.guild.me and webhook.name == MOD_LOG_WEBHOOK_NAME and webhook.token:
+                return webhook
+        return await channel.create_webhook(name=MOD_LOG_WEBHOOK_NAME, reason="Logs de moderação do Verl.ia")
+
     @app_commands.command(name="setup_logs", description="Define o canal para logs de moderação e eventos.")
+    @app_commands.describe(webhook="Envia os logs por um webhook do canal (não disputa o limite de mensagens do bot).")
     @app_commands.checks.has_permissions(administrator=True)
-    async def setup_logs(self, interaction: discord.Interaction, channel: discord.TextChannel):
+    async def setup_logs(self, interaction: discord.Interaction, channel: discord.TextChannel, webhook: bool = False):
         guild_id = str(interaction.guild.id)
         
         # Verifica se o bot tem permissão de enviar mensagens no canal
         if not channel.permissions_for(interaction.guild.me).send_messages:
             return await interaction.response.send_message(embed=error("Erro de Permissão", f"Eu não tenho permissão para enviar mensagens no canal {channel.mention}."), ephemeral=True)
+        if webhook and not channel.permissions_for(interaction.guild.me).manage_webhooks:
+            return await interaction.response.send_message(embed=error("Erro de Permissão", f"Eu não tenho permissão para gerenciar webhooks no canal {channel.mention}."), ephemeral=True)
 
+        # Buscar/criar o webhook e gravar no DB pode passar dos 3s que o Discord dá para responder
+        await interaction.response.defer(ephemeral=True)
         try:
+            # Com webhook, a URL fica em guild_settings junto do canal; sem ele, qualquer URL anterior é descartada
+            webhook_url = (await self._get_log_webhook(channel)).url if webhook else None
+            log_settings = {"mod_logs_channel_id": str(channel.id), "mod_logs_webhook_url": webhook_url}
+            
             # Tenta encontrar a configuração existente
-            existing_settings = await db.get_one("guild_settings", {"guild_id": guild_id})
+            existing_settings = await settings_cache.get(guild_id)
             
             if existing_settings:
                 # Atualiza a configuração existente
-                await db.update("guild_settings", {"guild_id": guild_id}, {"mod_logs_channel_id": str(channel.id)})
+                result = await db.update("guild_settings", {"guild_id": guild_id}, log_settings)
+                new_settings = {**existing_settings, **log_settings}
                 response_embed = success("Configuração Atualizada", f"O canal de logs de moderação foi atualizado para {channel.mention}.")
             else:
                 # Cria uma nova configuração
-                await db.save("guild_settings", {"guild_id": guild_id, "mod_logs_channel_id": str(channel.id)})
+                result = await db.save("guild_settings", {"guild_id": guild_id, **log_settings}, wait=True)
+                new_settings = {"guild_id": guild_id, **log_settings}
                 response_embed = success("Configuração Salva", f"O canal de logs de moderação foi definido para {channel.mention}.")
             
-            await interaction.response.send_message(embed=response_embed, ephemeral=True)
+            # Só atualiza o cache se a gravação deu certo; senão o bot usaria um canal que o DB não tem
+            if result and "error" in result:
+                log.error(f"Erro ao gravar o canal de logs da guilda {guild_id}: {result['error']}")
+                return await interaction.followup.send(embed=error("Erro", f"Não foi possível salvar o canal de logs: `{result['error']}`"), ephemeral=True)
+            settings_cache.set(guild_id, new_settings)
+            if webhook:
+                response_embed.add_field(name="Entrega", value="Via webhook do canal", inline=False)
+            
+            await interaction.followup.send(embed=response_embed, ephemeral=True)
             
             # Envia uma mensagem de teste no canal configurado
             test_embed = info("Logs Configurados!", f"Este canal ({channel.mention}) foi definido como o canal de logs de moderação por {interaction.user.mention}.")
@@ -45,13 +75,13 @@ class Settings(commands.Cog):
 
         except Exception as e:
             log.error(f"Erro ao configurar canal de logs para a guilda {guild_id}: {e}")
-            await interaction.response.send_message(embed=error("Erro", f"Ocorreu um erro ao configurar o canal de logs: `{e}`"), ephemeral=True)
+            await interaction.followup.send(embed=error("Erro", f"Ocorreu um erro ao configurar o canal de logs: `{e}`"), ephemeral=True)
 
     @app_commands.command(name="show_settings", description="Exibe as configurações atuais do bot para este servidor.")
     @app_commands.checks.has_permissions(administrator=True)
     async def show_settings(self, interaction: discord.Interaction):
         guild_id = str(interaction.guild.id)
-        settings = await db.get_one("guild_settings", {"guild_id": guild_id})
+        settings = await settings_cache.get(guild_id)
 
         embed = info("Configurações do Servidor", "Configurações atuais do bot para esta guilda.")
 
@@ -60,6 +90,7 @@ class Settings(commands.Cog):
             if mod_logs_channel_id:
                 mod_logs_channel = interaction.guild.get_channel(int(mod_logs_channel_id))
                 embed.add_field(name="Canal de Logs de Moderação", value=mod_logs_channel.mention if mod_logs_channel else f"ID: `{mod_logs_channel_id}` (Não encontrado)", inline=False)
+                embed.add_field(name="Entrega dos Logs", value="Webhook" if settings.get("mod_logs_webhook_url") else "Mensagens do bot", inline=False)
             else:
                 embed.add_field(name="Canal de Logs de Moderação", value="Não configurado", inline=False)
         else:
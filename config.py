@@ -15,6 +15,20 @@ INFO_COLOR = 0x3b82f6 # Azul claro
 # ID do bot (se necessário para comunicação interna ou DB)
 BOT_ID = os.environ.get('BOT_ID', '043a6b5b-a2f1-4812-bd92-dfe68e69f56a')
 
+# Mensagens completas mantidas pelo discord.py (os logs usam o armazenamento compacto de utils/message_store.py)
+MESSAGE_CACHE_SIZE = 200
+
+# Rate limits maiores que isto (segundos) levantam discord.RateLimited em vez de o discord.py
+# esperar dentro da chamada; o dispatcher de logs usa isso para recuar (o discord.py exige no mínimo 30)
+MAX_RATELIMIT_TIMEOUT = 30.0
+
+# Máximo de mutes vencidos processados em paralelo (a ordem dentro de cada guilda é preservada)
+MUTE_EXPIRY_CONCURRENCY = 10
+
+# Espera inicial e máxima (segundos) entre tentativas de carregar os mutes ativos do DB
+MUTE_LOAD_RETRY_DELAY = 5
+MUTE_LOAD_MAX_RETRY_DELAY = 300
+
 # Níveis de punição automática (número de warns -> ação)
 # Ex: 3 warns -> mute de 10 minutos, 5 warns -> ban
 PUNISHMENT_LEVELS = {
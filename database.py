@@ -8,15 +8,32 @@ LIMITES POR PLANO:
 - Pro Master: Ilimitado
 """
 
+import copy
 import os
 import json
-from typing import Any, Optional, List, Dict, Tuple
+import threading
+import time
+from bisect import insort
+from typing import Any, Optional, List, Dict, Set, Tuple
 from supabase import create_client, Client
 
 # Initialize Supabase client
 _supabase_url = os.getenv('SUPABASE_URL')
 _supabase_key = os.getenv('SUPABASE_KEY')
 _bot_id = os.getenv('BOT_ID')
+# 'blob': itens em um array JSON na coluna `data` de bot_databases (padrão)
+# 'rows': um item por linha na tabela bot_database_rows (database_id, item); a contagem
+#         vem de um count nessa tabela, e a coluna row_count de bot_databases não é mantida
+_storage_mode = os.getenv('DATABASE_STORAGE', 'blob')
+_ROWS_TABLE = 'bot_database_rows'
+_ROWS_PAGE_SIZE = 1000
+# Réplicas locais (com índices hash) dos bancos declarados em declare_index()
+_REPLICA_TTL = float(os.getenv('DATABASE_REPLICA_TTL', 300))
+_indexed_keys: Dict[str, Set[str]] = {}
+_replicas: Dict[str, '_Replica'] = {}
+_replica_lock = threading.RLock()
+# Tentativas do compare-and-swap (coluna `version`) antes de desistir por conflito
+_CAS_RETRIES = 5
 _supabase: Optional[Client] = None
 _user_plan: Optional[str] = None
 _plan_limits = {
@@ -84,6 +101,278 @@ def _check_plan_access(operation: str = "usar banco de dados") -> dict:
     
     return limits
 
+def _uses_rows() -> bool:
+    return _storage_mode == 'rows'
+
+def _json_text(value: Any) -> str:
+    """Representação textual de um valor, como retornada por `item->>chave` no Postgres."""
+    return value if isinstance(value, str) else json.dumps(value)
+
+def _rows_get(database_id: Any) -> List[Dict]:
+    """Lê todas as linhas (id, item, version) de um banco no modo 'rows', em páginas, na ordem de inserção."""
+    client = _get_client()
+    rows = []
+    start = 0
+    while True:
+        response = client.table(_ROWS_TABLE).select('*').eq('database_id', database_id) \
+            .order('id').range(start, start + _ROWS_PAGE_SIZE - 1).execute()
+        page = response.data or []
+        rows.extend(page)
+        if len(page) < _ROWS_PAGE_SIZE:
+            return rows
+        start += _ROWS_PAGE_SIZE
+
+def _rows_id_at(database_id: Any, index: int) -> Optional[Any]:
+    """Retorna o id da linha na posição `index` (ordem de inserção)."""
+    row = _rows_at(database_id, index)
+    return row['id'] if row else None
+
+def _rows_at(database_id: Any, index: int) -> Optional[Dict]:
+    """Retorna a linha (id, item, version) na posição `index` (ordem de inserção)."""
+    if index < 0:
+        return None
+    client = _get_client()
+    response = client.table(_ROWS_TABLE).select('*').eq('database_id', database_id) \
+        .order('id').range(index, index).execute()
+    return response.data[0] if response.data else None
+
+def _rows_count(database_id: Any) -> int:
+    """Conta as linhas de um banco no modo 'rows' (count no servidor, sem trafegar os itens)."""
+    response = _get_client().table(_ROWS_TABLE).select('id', count='exact').eq('database_id', database_id) \
+        .range(0, 0).execute()
+    return response.count or 0
+
+def _row_count(db: Dict, replica: Optional['_Replica'], max_rows: int) -> int:
+    """Quantidade atual de itens para checar o limite do plano (sem consulta extra em planos ilimitados)."""
+    if not _uses_rows():
+        return db.get('row_count', 0)
+    if replica is not None:
+        return len(replica.items)
+    return _rows_count(db['id']) if max_rows > 0 else 0
+
+def _hashable(value: Any) -> Any:
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return json.dumps(value, sort_keys=True)
+
+class _Replica:
+    """Cópia local de um banco com índices hash nas chaves declaradas.
+
+    A réplica guarda cópias próprias dos itens e as leituras devolvem cópias, para que
+    alterar um dict recebido ou gravado não mude a réplica nem seus índices.
+    """
+    
+    def __init__(self, db: Dict, items: List[Dict], row_ids: Optional[List[Any]], keys: Set[str], row_versions: Optional[List[Any]] = None):
+        self.db = {k: v for k, v in db.items() if k != 'data'}
+        self.items = items
+        self.row_ids = row_ids  # ids das linhas no modo 'rows' (None no modo 'blob')
+        self.row_versions = row_versions if row_versions is not None else ([None] * len(items) if row_ids is not None else None)
+        self.keys = set(keys)
+        self.loaded_at = time.monotonic()
+        self._rebuild()
+    
+    def _rebuild(self):
+        self.indexes: Dict[str, Dict[Any, List[int]]] = {key: {} for key in self.keys}
+        for position, item in enumerate(self.items):
+            self._index(position, item)
+    
+    def _index(self, position: int, item: Dict):
+        for key in self.keys:
+            if key in item:
+                insort(self.indexes[key].setdefault(_hashable(item[key]), []), position)
+    
+    def _unindex(self, position: int, item: Dict):
+        for key in self.keys:
+            if key in item:
+                positions = self.indexes[key].get(_hashable(item[key]), [])
+                if position in positions:
+                    positions.remove(position)
+    
+    def positions(self, key: str, value: Any) -> List[int]:
+        """Posições (em ordem) dos itens com item[key] == value."""
+        if key in self.indexes:
+            return list(self.indexes[key].get(_hashable(value), []))
+        return [i for i, item in enumerate(self.items) if item.get(key) == value]
+    
+    def append(self, item: Dict, row_id: Any = None, row_version: Any = None):
+        item = copy.deepcopy(item)
+        self.items.append(item)
+        if self.row_ids is not None:
+            self.row_ids.append(row_id)
+            self.row_versions.append(row_version)
+        self._index(len(self.items) - 1, item)
+    
+    def replace_all(self, db: Dict, items: List[Dict]):
+        self.db = {k: v for k, v in db.items() if k != 'data'}
+        self.items = copy.deepcopy(items)
+        self._rebuild()
+    
+    def replace(self, index: int, item: Dict):
+        item = copy.deepcopy(item)
+        self._unindex(index, self.items[index])
+        self.items[index] = item
+        self._index(index, item)
+    
+    def remove(self, index: int):
+        # As posições seguintes mudam: reconstrói os índices (apenas memória)
+        self.items.pop(index)
+        if self.row_ids is not None:
+            self.row_ids.pop(index)
+            self.row_versions.pop(index)
+        self._rebuild()
+    
+    def remove_where(self, key: str, value: Any):
+        keep = [i for i, item in enumerate(self.items) if item.get(key) != value]
+        self.items = [self.items[i] for i in keep]
+        if self.row_ids is not None:
+            self.row_ids = [self.row_ids[i] for i in keep]
+            self.row_versions = [self.row_versions[i] for i in keep]
+        self._rebuild()
+    
+    def row_id(self, index: int) -> Optional[Any]:
+        if self.row_ids is None or index < 0 or index >= len(self.row_ids):
+            return None
+        return self.row_ids[index]
+    
+    def row(self, index: int) -> Optional[Dict]:
+        """Linha (id, item, version) na posição, no formato de bot_database_rows; None se o id for desconhecido."""
+        row_id = self.row_id(index)
+        if row_id is None:
+            return None
+        return {'id': row_id, 'item': self.items[index], 'version': self.row_versions[index]}
+
+def _get_replica(db_name: str) -> Optional[_Replica]:
+    """Retorna a réplica local do banco (carregando-a se preciso) ou None se não houver índices declarados."""
+    with _replica_lock:
+        keys = _indexed_keys.get(db_name)
+        if keys is None:
+            return None
+        keys = set(keys)
+        previous = _replicas.get(db_name)
+        if previous is not None and time.monotonic() - previous.loaded_at < _REPLICA_TTL:
+            return previous
+    
+    # Carrega fora do lock: outras threads continuam lendo e escrevendo enquanto a rede responde
+    db = get_database(db_name)
+    if db is None:
+        with _replica_lock:
+            if _replicas.get(db_name) is previous:
+                _replicas.pop(db_name, None)
+        return None
+    if _uses_rows():
+        rows = _rows_get(db['id'])
+        replica = _Replica(db, [row['item'] for row in rows], [row['id'] for row in rows], keys,
+                           [row.get('version') for row in rows])
+    else:
+        replica = _Replica(db, list(db.get('data') or []), None, keys)
+    
+    with _replica_lock:
+        current = _replicas.get(db_name)
+        if current is not previous and current is not None:
+            # Outra thread já publicou uma réplica mais nova
+            return current
+        if current is previous:
+            _replicas[db_name] = replica
+    return replica
+
+def _drop_replica(db_name: str):
+    with _replica_lock:
+        _replicas.pop(db_name, None)
+
+def declare_index(db_name: str, *keys: str):
+    """
+    Mantém uma réplica local do banco com índices hash nas chaves informadas.
+    Buscas por essas chaves passam a ser feitas em memória, e escritas locais
+    atualizam a réplica. Ex.: declare_index('warns', 'user_id', 'guild_id')
+    """
+    with _replica_lock:
+        _indexed_keys.setdefault(db_name, set()).update(keys)
+        _replicas.pop(db_name, None)
+
+def refresh_replica(db_name: str):
+    """
+    Descarta a réplica local para que a próxima leitura recarregue os dados do servidor.
+    """
+    _drop_replica(db_name)
+
+def _cas_blob(db_name: str, mutate, db: Dict, replica: Optional[_Replica]) -> bool:
+    """
+    Grava o array JSON de um banco com compare-and-swap na coluna `version`.
+    `mutate(data)` recebe uma cópia do array e retorna o novo array (ou None para desistir).
+    Em caso de conflito, recarrega o banco e reaplica `mutate`. Sem a coluna
+    `version`, faz uma escrita simples (comportamento antigo).
+    """
+    client = _get_client()
+    for attempt in range(_CAS_RETRIES):
+        if attempt:
+            _drop_replica(db_name)
+            replica = _get_replica(db_name)
+            db = replica.db if replica else get_database(db_name)
+            if db is None:
+                return False
+        data = mutate(list(replica.items) if replica else list(db.get('data') or []))
+        if data is None:
+            return False
+        
+        version = db.get('version')
+        values = {'data': data, 'row_count': len(data)}
+        if version is not None:
+            values['version'] = version + 1
+        query = client.table('bot_databases').update(values).eq('id', db['id'])
+        if version is not None:
+            query = query.eq('version', version)
+        response = query.execute()
+        
+        if version is None or response.data:
+            if replica:
+                with _replica_lock:
+                    replica.replace_all({**db, **values}, data)
+            return True
+    print(f"❌ Conflito de escrita persistente em '{db_name}' após {_CAS_RETRIES} tentativas.")
+    return False
+
+def _cas_row(db_name: str, replica: Optional[_Replica], position: int, row: Dict, item: Dict) -> bool:
+    """
+    Atualiza uma linha (modo 'rows') com compare-and-swap na sua coluna `version`.
+    Retorna False em caso de conflito.
+    """
+    version = row.get('version')
+    values = {'item': item}
+    if version is not None:
+        values['version'] = version + 1
+    query = _get_client().table(_ROWS_TABLE).update(values).eq('id', row['id'])
+    if version is not None:
+        query = query.eq('version', version)
+    response = query.execute()
+    if version is not None and not response.data:
+        return False
+    if replica and position >= 0:
+        with _replica_lock:
+            replica.replace(position, item)
+            replica.row_versions[position] = values.get('version')
+    return True
+
+def _update_row(db_name: str, replica: Optional[_Replica], position: int, row: Dict, item: Dict, matches=None) -> bool:
+    """
+    Grava `item` na linha com `_cas_row`; em caso de conflito, relê a linha pelo id e tenta
+    de novo. `matches(row)` decide se a linha relida ainda deve receber `item`.
+    """
+    for attempt in range(_CAS_RETRIES):
+        if attempt:
+            # A réplica está desatualizada: descarta e passa a trabalhar só com o servidor
+            _drop_replica(db_name)
+            replica = None
+            response = _get_client().table(_ROWS_TABLE).select('*').eq('id', row['id']).execute()
+            if not response.data or (matches is not None and not matches(response.data[0])):
+                return False
+            row = response.data[0]
+        if _cas_row(db_name, replica, position, row, item):
+            return True
+    print(f"❌ Conflito de escrita persistente em '{db_name}' após {_CAS_RETRIES} tentativas.")
+    return False
+
 def get_database(name: str) -> Optional[Dict]:
     """
     Obtém um banco de dados pelo nome.
@@ -139,7 +428,13 @@ def get_all_data(db_name: str) -> List[Dict]:
     """
     Obtém todos os dados de um banco de dados.
     """
+    replica = _get_replica(db_name)
+    if replica is not None:
+        with _replica_lock:
+            return copy.deepcopy(replica.items)
     db = get_database(db_name)
+    if db and _uses_rows():
+        return [row['item'] for row in _rows_get(db['id'])]
     if db and db.get('data'):
         return db['data']
     return []
@@ -152,28 +447,37 @@ def add_data(db_name: str, item: Dict) -> bool:
     try:
         limits = _check_plan_access("adicionar dados")
         
-        db = get_or_create_database(db_name)
+        replica = _get_replica(db_name)
+        db = replica.db if replica else get_or_create_database(db_name)
         if db is None:
             return False
         
-        data = db.get('data', [])
-        row_count = db.get('row_count', 0)
         max_rows = limits['max_rows']
+        row_count = _row_count(db, replica, max_rows)
         
         # Check limit (unless unlimited)
         if max_rows > 0 and row_count >= max_rows:
             print(f"❌ Limite de {max_rows} registros atingido para plano atual. Faça upgrade para mais espaço.")
             return False
         
-        data.append(item)
-        
         client = _get_client()
-        client.table('bot_databases').update({
-            'data': data,
-            'row_count': len(data)
-        }).eq('id', db['id']).execute()
+        if _uses_rows():
+            # Envia apenas o novo item
+            response = client.table(_ROWS_TABLE).insert({'database_id': db['id'], 'item': item}).execute()
+            if replica:
+                row = response.data[0] if response.data else {}
+                with _replica_lock:
+                    replica.append(item, row.get('id'), row.get('version'))
+            return True
         
-        return True
+        def append(data):
+            if max_rows > 0 and len(data) >= max_rows:
+                print(f"❌ Limite de {max_rows} registros atingido para plano atual. Faça upgrade para mais espaço.")
+                return None
+            data.append(item)
+            return data
+        
+        return _cas_blob(db_name, append, db, replica)
     except DatabaseAccessError as e:
         print(str(e))
         return False
@@ -188,22 +492,29 @@ def update_data(db_name: str, index: int, item: Dict) -> bool:
     try:
         _check_plan_access("atualizar dados")
         
-        db = get_database(db_name)
+        replica = _get_replica(db_name)
+        db = replica.db if replica else get_database(db_name)
         if db is None:
             return False
         
-        data = db.get('data', [])
-        if index < 0 or index >= len(data):
-            return False
-        
-        data[index] = item
+        if _uses_rows():
+            row = None
+            if replica:
+                with _replica_lock:
+                    row = replica.row(index)
+            if row is None:
+                row = _rows_at(db['id'], index)
+            if row is None:
+                return False
+            return _update_row(db_name, replica, index, row, item)
         
-        client = _get_client()
-        client.table('bot_databases').update({
-            'data': data
-        }).eq('id', db['id']).execute()
+        def replace(data):
+            if index < 0 or index >= len(data):
+                return None
+            data[index] = item
+            return data
         
-        return True
+        return _cas_blob(db_name, replace, db, replica)
     except DatabaseAccessError as e:
         print(str(e))
         return False
@@ -218,23 +529,28 @@ def delete_data(db_name: str, index: int) -> bool:
     try:
         _check_plan_access("deletar dados")
         
-        db = get_database(db_name)
+        replica = _get_replica(db_name)
+        db = replica.db if replica else get_database(db_name)
         if db is None:
             return False
         
-        data = db.get('data', [])
-        if index < 0 or index >= len(data):
-            return False
-        
-        data.pop(index)
+        if _uses_rows():
+            row_id = (replica.row_id(index) if replica else None) or _rows_id_at(db['id'], index)
+            if row_id is None:
+                return False
+            _get_client().table(_ROWS_TABLE).delete().eq('id', row_id).execute()
+            if replica:
+                with _replica_lock:
+                    replica.remove(index)
+            return True
         
-        client = _get_client()
-        client.table('bot_databases').update({
-            'data': data,
-            'row_count': len(data)
-        }).eq('id', db['id']).execute()
+        def remove(data):
+            if index < 0 or index >= len(data):
+                return None
+            data.pop(index)
+            return data
         
-        return True
+        return _cas_blob(db_name, remove, db, replica)
     except DatabaseAccessError as e:
         print(str(e))
         return False
@@ -246,6 +562,19 @@ def find_data(db_name: str, key: str, value: Any) -> List[Dict]:
     """
     Busca itens que correspondem a um critério.
     """
+    replica = _get_replica(db_name)
+    if replica is not None:
+        # Sob o lock: uma escrita concorrente pode reconstruir os índices no meio da leitura
+        with _replica_lock:
+            return [copy.deepcopy(replica.items[i]) for i in replica.positions(key, value)]
+    if _uses_rows():
+        db = get_database(db_name)
+        if db is None:
+            return []
+        # Filtro aplicado no servidor: só os itens encontrados trafegam
+        response = _get_client().table(_ROWS_TABLE).select('item').eq('database_id', db['id']) \
+            .eq(f'item->>{key}', _json_text(value)).order('id').execute()
+        return [row['item'] for row in (response.data or []) if row['item'].get(key) == value]
     data = get_all_data(db_name)
     return [item for item in data if item.get(key) == value]
 
@@ -254,6 +583,11 @@ def find_index(db_name: str, key: str, value: Any) -> int:
     Encontra o índice do primeiro item que corresponde ao critério.
     Retorna -1 se não encontrado.
     """
+    replica = _get_replica(db_name)
+    if replica is not None:
+        with _replica_lock:
+            positions = replica.positions(key, value)
+        return positions[0] if positions else -1
     data = get_all_data(db_name)
     for i, item in enumerate(data):
         if item.get(key) == value:
@@ -272,11 +606,14 @@ def clear_database(db_name: str) -> bool:
             return False
         
         client = _get_client()
+        if _uses_rows():
+            client.table(_ROWS_TABLE).delete().eq('database_id', db['id']).execute()
         client.table('bot_databases').update({
             'data': [],
             'row_count': 0
         }).eq('id', db['id']).execute()
         
+        _drop_replica(db_name)
         return True
     except DatabaseAccessError as e:
         print(str(e))
@@ -289,6 +626,13 @@ def count_data(db_name: str) -> int:
     """
     Conta quantos registros existem no banco de dados.
     """
+    replica = _get_replica(db_name)
+    if replica is not None:
+        with _replica_lock:
+            return len(replica.items)
+    if _uses_rows():
+        db = get_database(db_name)
+        return _rows_count(db['id']) if db else 0
     data = get_all_data(db_name)
     return len(data)
 
@@ -316,22 +660,30 @@ def delete_all_by_key(db_name: str, key: str, value: Any) -> int:
     try:
         _check_plan_access("deletar dados")
         
-        db = get_database(db_name)
+        replica = _get_replica(db_name)
+        db = replica.db if replica else get_database(db_name)
         if db is None:
             return 0
         
-        data = db.get('data', [])
-        original_count = len(data)
-        new_data = [item for item in data if item.get(key) != value]
-        deleted_count = original_count - len(new_data)
+        if _uses_rows():
+            response = _get_client().table(_ROWS_TABLE).delete().eq('database_id', db['id']) \
+                .eq(f'item->>{key}', _json_text(value)).execute()
+            deleted_count = len(response.data or [])
+            if deleted_count > 0 and replica:
+                with _replica_lock:
+                    replica.remove_where(key, value)
+            return deleted_count
         
-        if deleted_count > 0:
-            client = _get_client()
-            client.table('bot_databases').update({
-                'data': new_data,
-                'row_count': len(new_data)
-            }).eq('id', db['id']).execute()
+        deleted_count = 0
+        
+        def remove_matching(data):
+            nonlocal deleted_count
+            new_data = [item for item in data if item.get(key) != value]
+            deleted_count = len(data) - len(new_data)
+            return new_data if deleted_count > 0 else None
         
+        if not _cas_blob(db_name, remove_matching, db, replica):
+            return 0
         return deleted_count
     except DatabaseAccessError as e:
         print(str(e))
@@ -340,24 +692,252 @@ def delete_all_by_key(db_name: str, key: str, value: Any) -> int:
         print(f"Erro ao deletar dados: {e}")
         return 0
 
+def modify_by_key(db_name: str, key: str, value: Any, func) -> bool:
+    """
+    Lê o primeiro item com a chave/valor, aplica `func(item_atual | None)` e grava o
+    resultado (atualiza ou insere), com compare-and-swap na coluna `version`: se outro
+    processo alterou os dados no meio tempo, relê e reaplica `func`. Retornar None em
+    `func` cancela a escrita. Use para contadores (warns, saldo) sob concorrência.
+    """
+    try:
+        limits = _check_plan_access("atualizar dados")
+        max_rows = limits['max_rows']
+        
+        if not _uses_rows():
+            replica = _get_replica(db_name)
+            db = replica.db if replica else get_or_create_database(db_name)
+            if db is None:
+                return False
+            
+            def apply(data):
+                idx = next((i for i, item in enumerate(data) if item.get(key) == value), -1)
+                new_item = func(copy.deepcopy(data[idx]) if idx >= 0 else None)
+                if new_item is None:
+                    return None
+                if idx >= 0:
+                    data[idx] = new_item
+                elif max_rows > 0 and len(data) >= max_rows:
+                    print(f"❌ Limite de {max_rows} registros atingido para plano atual. Faça upgrade para mais espaço.")
+                    return None
+                else:
+                    data.append(new_item)
+                return data
+            
+            return _cas_blob(db_name, apply, db, replica)
+        
+        for _ in range(_CAS_RETRIES):
+            replica = _get_replica(db_name)
+            db = replica.db if replica else get_or_create_database(db_name)
+            if db is None:
+                return False
+            
+            position, row = -1, None
+            if replica:
+                with _replica_lock:
+                    positions = replica.positions(key, value)
+                    if positions:
+                        position = positions[0]
+                        row = {'id': replica.row_id(position), 'item': replica.items[position], 'version': replica.row_versions[position]}
+            else:
+                response = _get_client().table(_ROWS_TABLE).select('*').eq('database_id', db['id']) \
+                    .eq(f'item->>{key}', _json_text(value)).order('id').range(0, 0).execute()
+                row = response.data[0] if response.data else None
+            
+            new_item = func(copy.deepcopy(row['item']) if row else None)
+            if new_item is None:
+                return False
+            if row is None:
+                return add_data(db_name, new_item)
+            if row['id'] is not None and _cas_row(db_name, replica, position, row, new_item):
+                return True
+            _drop_replica(db_name)
+        print(f"❌ Conflito de escrita persistente em '{db_name}' após {_CAS_RETRIES} tentativas.")
+        return False
+    except DatabaseAccessError as e:
+        print(str(e))
+        return False
+    except Exception as e:
+        print(f"Erro ao atualizar dados: {e}")
+        return False
+
 def update_by_key(db_name: str, key: str, value: Any, new_item: Dict) -> bool:
     """
     Atualiza o primeiro item que corresponde à chave/valor.
     """
-    idx = find_index(db_name, key, value)
-    if idx >= 0:
-        return update_data(db_name, idx, new_item)
-    return False
+    return modify_by_key(db_name, key, value, lambda current: new_item if current is not None else None)
 
 def upsert_data(db_name: str, key: str, value: Any, item: Dict) -> bool:
     """
     Atualiza se existir, insere se não existir (upsert).
     """
-    idx = find_index(db_name, key, value)
-    if idx >= 0:
-        return update_data(db_name, idx, item)
-    else:
-        return add_data(db_name, item)
+    return modify_by_key(db_name, key, value, lambda current: item)
+
+def add_many(db_name: str, items: List[Dict]) -> bool:
+    """
+    Adiciona vários itens em uma única escrita.
+    O limite de linhas do plano é verificado uma vez para o lote inteiro.
+    """
+    if not items:
+        return True
+    try:
+        limits = _check_plan_access("adicionar dados")
+        max_rows = limits['max_rows']
+        
+        replica = _get_replica(db_name)
+        db = replica.db if replica else get_or_create_database(db_name)
+        if db is None:
+            return False
+        
+        row_count = _row_count(db, replica, max_rows)
+        if max_rows > 0 and row_count + len(items) > max_rows:
+            print(f"❌ Limite de {max_rows} registros excedido: há {row_count} e o lote tem {len(items)}. Faça upgrade para mais espaço.")
+            return False
+        
+        if _uses_rows():
+            client = _get_client()
+            inserted = []
+            for start in range(0, len(items), _ROWS_PAGE_SIZE):
+                chunk = items[start:start + _ROWS_PAGE_SIZE]
+                response = client.table(_ROWS_TABLE).insert([{'database_id': db['id'], 'item': item} for item in chunk]).execute()
+                inserted.extend(response.data or [])
+            if replica:
+                with _replica_lock:
+                    if len(inserted) == len(items):
+                        for row in inserted:
+                            replica.append(row['item'], row.get('id'), row.get('version'))
+                    else:
+                        _replicas.pop(db_name, None)
+            return True
+        
+        def extend(data):
+            if max_rows > 0 and len(data) + len(items) > max_rows:
+                print(f"❌ Limite de {max_rows} registros excedido: há {len(data)} e o lote tem {len(items)}. Faça upgrade para mais espaço.")
+                return None
+            data.extend(items)
+            return data
+        
+        return _cas_blob(db_name, extend, db, replica)
+    except DatabaseAccessError as e:
+        print(str(e))
+        return False
+    except Exception as e:
+        print(f"Erro ao adicionar dados: {e}")
+        return False
+
+def update_many(db_name: str, key: str, items: List[Dict]) -> int:
+    """
+    Substitui, para cada item da lista, o primeiro item existente com o mesmo valor em `key`.
+    Aplica tudo em uma única escrita (no modo 'rows', cada linha é gravada com
+    compare-and-swap na sua `version`). Retorna quantidade de itens atualizados.
+    """
+    if not items:
+        return 0
+    try:
+        _check_plan_access("atualizar dados")
+        new_items = {_hashable(item.get(key)): item for item in items}
+        
+        replica = _get_replica(db_name)
+        db = replica.db if replica else get_database(db_name)
+        if db is None:
+            return 0
+        
+        if _uses_rows():
+            if replica:
+                rows = []
+                with _replica_lock:
+                    for value in new_items:
+                        positions = replica.positions(key, value)
+                        if positions:
+                            rows.append({'id': replica.row_id(positions[0]), 'version': replica.row_versions[positions[0]], 'item': replica.items[positions[0]]})
+            else:
+                response = _get_client().table(_ROWS_TABLE).select('*').eq('database_id', db['id']) \
+                    .in_(f'item->>{key}', [_json_text(item.get(key)) for item in items]).order('id').execute()
+                rows, seen = [], set()
+                for row in response.data or []:
+                    value = _hashable(row['item'].get(key))
+                    if value in new_items and value not in seen:
+                        seen.add(value)
+                        rows.append(row)
+            if not rows:
+                return 0
+            if any(row['id'] is None for row in rows):
+                _drop_replica(db_name)
+                return update_many(db_name, key, items)
+            
+            updated_count = 0
+            for row in rows:
+                value = _hashable(row['item'].get(key))
+                # Só reaplica se a linha relida após um conflito ainda tiver o mesmo valor em `key`
+                if _update_row(db_name, None, -1, row, new_items[value],
+                               matches=lambda current, value=value: _hashable(current['item'].get(key)) == value):
+                    updated_count += 1
+            _drop_replica(db_name)
+            return updated_count
+        
+        updated_count = 0
+        
+        def replace_matching(data):
+            nonlocal updated_count
+            pending = dict(new_items)
+            updated_count = 0
+            for i, item in enumerate(data):
+                value = _hashable(item.get(key))
+                if value in pending:
+                    data[i] = pending.pop(value)
+                    updated_count += 1
+            return data if updated_count > 0 else None
+        
+        if not _cas_blob(db_name, replace_matching, db, replica):
+            return 0
+        return updated_count
+    except DatabaseAccessError as e:
+        print(str(e))
+        return 0
+    except Exception as e:
+        print(f"Erro ao atualizar dados: {e}")
+        return 0
+
+def delete_many_by_key(db_name: str, key: str, values: List[Any]) -> int:
+    """
+    Deleta TODOS os itens cujo valor em `key` esteja na lista, em uma única escrita.
+    Retorna quantidade de itens deletados.
+    """
+    if not values:
+        return 0
+    try:
+        _check_plan_access("deletar dados")
+        targets = {_hashable(value) for value in values}
+        
+        replica = _get_replica(db_name)
+        db = replica.db if replica else get_database(db_name)
+        if db is None:
+            return 0
+        
+        if _uses_rows():
+            response = _get_client().table(_ROWS_TABLE).delete().eq('database_id', db['id']) \
+                .in_(f'item->>{key}', [_json_text(value) for value in values]).execute()
+            deleted_count = len(response.data or [])
+            if deleted_count > 0:
+                _drop_replica(db_name)
+            return deleted_count
+        
+        deleted_count = 0
+        
+        def remove_matching(data):
+            nonlocal deleted_count
+            new_data = [item for item in data if _hashable(item.get(key)) not in targets]
+            deleted_count = len(data) - len(new_data)
+            return new_data if deleted_count > 0 else None
+        
+        if not _cas_blob(db_name, remove_matching, db, replica):
+            return 0
+        return deleted_count
+    except DatabaseAccessError as e:
+        print(str(e))
+        return 0
+    except Exception as e:
+        print(f"Erro ao deletar dados: {e}")
+        return 0
 
 def list_databases() -> List[str]:
     """
@@ -388,8 +968,11 @@ def delete_database(db_name: str) -> bool:
             return False
         
         client = _get_client()
+        if _uses_rows():
+            client.table(_ROWS_TABLE).delete().eq('database_id', db['id']).execute()
         client.table('bot_databases').delete().eq('id', db['id']).execute()
         
+        _drop_replica(db_name)
         return True
     except DatabaseAccessError as e:
         print(str(e))
@@ -398,6 +981,36 @@ def delete_database(db_name: str) -> bool:
         print(f"Erro ao deletar banco de dados: {e}")
         return False
 
+def migrate_to_rows(db_name: str) -> bool:
+    """
+    Move os itens do array JSON de um banco para a tabela de linhas (modo 'rows').
+    """
+    try:
+        _check_plan_access("migrar banco de dados")
+        
+        db = get_database(db_name)
+        if db is None:
+            return False
+        
+        data = db.get('data') or []
+        client = _get_client()
+        for start in range(0, len(data), _ROWS_PAGE_SIZE):
+            chunk = data[start:start + _ROWS_PAGE_SIZE]
+            client.table(_ROWS_TABLE).insert([{'database_id': db['id'], 'item': item} for item in chunk]).execute()
+        client.table('bot_databases').update({
+            'data': [],
+            'row_count': len(data)
+        }).eq('id', db['id']).execute()
+        
+        _drop_replica(db_name)
+        return True
+    except DatabaseAccessError as e:
+        print(str(e))
+        return False
+    except Exception as e:
+        print(f"Erro ao migrar banco de dados: {e}")
+        return False
+
 def get_plan_info() -> Dict:
     """
     Retorna informações sobre o plano atual e seus limites.
@@ -434,6 +1047,12 @@ def get_plan_info() -> Dict:
 #   - delete_all_by_key(db_name, k, v)  → Deleta TODOS que correspondem
 #   - update_by_key(db_name, k, v, new) → Atualiza primeiro encontrado
 #   - upsert_data(db_name, k, v, item)  → Atualiza ou insere
+#   - modify_by_key(db_name, k, v, fn)  → Lê, aplica fn e grava (seguro p/ contadores)
+#
+# 📦 EM LOTE (uma única escrita para a lista inteira):
+#   - add_many(db_name, items)          → Adiciona vários itens
+#   - update_many(db_name, key, items)  → Substitui itens pelo valor de `key`
+#   - delete_many_by_key(db_name, k, vs)→ Deleta itens com `key` em `vs`
 #
 # 🗂️ GERENCIAMENTO:
 #   - get_database(db_name)             → Obtém objeto do banco
@@ -441,6 +1060,27 @@ def get_plan_info() -> Dict:
 #   - list_databases()                  → Lista bancos existentes
 #   - delete_database(db_name)          → Deleta banco completo
 #   - get_plan_info()                   → Info do plano atual
+#   - migrate_to_rows(db_name)          → Move o array JSON para linhas
+#
+# ⚡ RÉPLICA LOCAL COM ÍNDICES:
+#   - declare_index(db_name, *keys)     → Mantém o banco em memória com índices
+#                                         hash; buscas por chave não acessam a rede
+#   - refresh_replica(db_name)          → Força recarregar a réplica do servidor
+#
+# 💾 MODO DE ARMAZENAMENTO (variável DATABASE_STORAGE):
+#   - blob (padrão) → todos os itens em um array JSON; cada escrita reenvia o array
+#   - rows          → um item por linha em bot_database_rows; escritas enviam só o
+#                     item afetado. Migre bancos existentes com migrate_to_rows().
+#
+# 🔒 CONCORRÊNCIA: com uma coluna inteira `version` (default 0) em bot_databases
+#   (modo blob) e em bot_database_rows (modo rows), as escritas usam
+#   compare-and-swap e são refeitas em caso de conflito, sem perder atualizações.
+#
+# # Contador seguro sob concorrência
+# modify_by_key('economy', 'user_id', '123', lambda cur: {
+#     **(cur or {'user_id': '123', 'balance': 0}),
+#     'balance': (cur or {}).get('balance', 0) + 100
+# })
 #
 # ═══════════════════════════════════════════════════════════════════════════════
 # 💡 EXEMPLOS DE USO
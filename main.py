@@ -3,7 +3,8 @@ import discord
 import logging
 import os
 from datetime import datetime
-from discord.ext import commands, tasks
+from discord.ext import commands
+from utils.scheduler import MuteScheduler
 
 """Moderador - Criado com Verl.ia Ultimate"""
 
@@ -20,9 +21,26 @@ intents.guilds = True
 class Bot(commands.Bot):
     """Classe Bot."""
     def __init__(self):
-        super().__init__(command_prefix='!', intents=intents, help_command=None)
+        from config import MAX_RATELIMIT_TIMEOUT, MESSAGE_CACHE_SIZE
+        
+        # O conteúdo usado nos logs fica em utils.message_store; o cache do discord.py pode ser pequeno
+        super().__init__(command_prefix='!', intents=intents, help_command=None, max_messages=MESSAGE_CACHE_SIZE,
+                         max_ratelimit_timeout=MAX_RATELIMIT_TIMEOUT)
+        self.mute_scheduler = MuteScheduler(self.expire_mutes)
+        self._scheduler_loader = None
+        self.metrics_runner = None
     
     async def setup_hook(self):
+        from utils.database import db # Importa aqui para evitar circular dependency
+        from utils.metrics import start_metrics_server
+        
+        # Expõe /metrics se METRICS_PORT estiver definido
+        self.metrics_runner = await start_metrics_server()
+        
+        # Abre a sessão HTTP do DB e pré-aquece a conexão
+        await db.start()
+        await db.warmup()
+        
         # Carrega as cogs
         initial_extensions = [
             'cogs.moderation',
@@ -41,80 +59,130 @@ class Bot(commands.Bot):
         await self.tree.sync()
         log.info('Comandos de barra sincronizados com sucesso.')
         
-        # Inicia a task de verificação de mutes
-        self.check_mutes.start()
+        # Agenda o fim dos mutes ativos (carregados do DB assim que o bot estiver pronto)
+        # Referência mantida: o loop guarda as tarefas apenas por referência fraca
+        self._scheduler_loader = asyncio.create_task(self.start_mute_scheduler())
+    
+    async def close(self):
+        from utils.database import db # Importa aqui para evitar circular dependency
+        from utils.mod_logs import mod_logs
+        
+        if self._scheduler_loader is not None:
+            self._scheduler_loader.cancel()
+        self.mute_scheduler.stop()
+        # Descarrega as cogs antes de drenar os logs: o cog_unload delas ainda enfileira logs (ex.: edições agrupadas)
+        for extension in tuple(self.extensions):
+            try:
+                await self.unload_extension(extension)
+            except Exception as e:
+                log.error(f'Erro ao descarregar {extension}: {e}')
+        # Envia os logs pendentes enquanto a conexão com o Discord ainda está aberta
+        await mod_logs.close()
+        await super().close()
+        await db.close()
+        if self.metrics_runner is not None:
+            await self.metrics_runner.cleanup()
     
     async def on_ready(self):
+        from utils.cache import settings_cache
+        
         log.info(f'🤖 {self.user} está online em {len(self.guilds)} servidores.')
+        
+        # Carrega as configurações de todas as guildas em uma única consulta
+        loaded = await settings_cache.preload(guild.id for guild in self.guilds)
+        log.info(f'⚙️ Configurações de {loaded} servidores pré-carregadas.')
         await self.change_presence(activity=discord.Game('!help'))
 
-    @tasks.loop(minutes=1)
-    async def check_mutes(self):
+    async def start_mute_scheduler(self):
+        from config import MUTE_LOAD_RETRY_DELAY, MUTE_LOAD_MAX_RETRY_DELAY
+        from utils.database import db, DatabaseError # Importa aqui para evitar circular dependency
+        
+        await self.wait_until_ready()
+        # Os mutes já carregados vencem normalmente enquanto a carga é refeita
+        self.mute_scheduler.start()
+        delay = MUTE_LOAD_RETRY_DELAY
+        while True:
+            try:
+                loaded = await self.mute_scheduler.load(db)
+                break
+            except DatabaseError as e:
+                log.error(f'Falha ao carregar os mutes ativos ({e}); nova tentativa em {delay}s.')
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MUTE_LOAD_MAX_RETRY_DELAY)
+        log.info(f'⏲️ {loaded} mutes ativos agendados.')
+
+    async def expire_mutes(self, mute_records):
+        """Processa os mutes vencidos entregues pelo agendador.
+
+        Guildas diferentes são processadas em paralelo (limitado por um semáforo global),
+        preservando a ordem dentro de cada guilda; os registros são removidos do DB em uma única requisição.
+        """
+        from config import MUTE_EXPIRY_CONCURRENCY
         from utils.database import db # Importa aqui para evitar circular dependency
-        from config import MOD_LOGS_CHANNEL_ID
         
-        now = datetime.utcnow().timestamp()
+        by_guild = {}
+        for mute_record in mute_records:
+            by_guild.setdefault(str(mute_record['guild_id']), []).append(mute_record)
+        semaphore = asyncio.Semaphore(MUTE_EXPIRY_CONCURRENCY)
+        
+        async def process_guild(records):
+            for mute_record in records:
+                async with semaphore:
+                    try:
+                        await self._expire_mute(mute_record)
+                    except Exception as e:
+                        log.error(f"Erro na verificação de mute para {mute_record.get('user_id')}: {e}")
+        
+        await asyncio.gather(*(process_guild(records) for records in by_guild.values()))
+        
+        # Remove os registros do banco de dados em uma única requisição
+        pipeline = db.pipeline()
+        ids = [mute_record['id'] for mute_record in mute_records if mute_record.get('id') is not None]
+        if ids:
+            pipeline.delete("mutes", {"id": {"in": ids}})
+        for mute_record in mute_records:
+            if mute_record.get('id') is None:
+                pipeline.delete("mutes", {"user_id": mute_record['user_id'], "guild_id": mute_record['guild_id']})
+        await pipeline.execute()
+
+    async def _expire_mute(self, mute_record):
+        """Remove o timeout de um membro cujo mute venceu e registra no canal de logs."""
+        from utils.mod_logs import mod_logs
+        
+        guild_id = int(mute_record['guild_id'])
+        user_id = int(mute_record['user_id'])
+        
+        guild = self.get_guild(guild_id)
+        if not guild:
+            log.warning(f"Guild {guild_id} não encontrada para unmute de {user_id}. Removendo mute do DB.")
+            return
         
-        # Busca por mutes que já deveriam ter terminado
-        # Note: A função 'get' do seu 'db' não permite filtros complexos diretamente como '<'. 
-        # Terei que pegar todos e filtrar no código. Este é um design de banco de dados simplificado.
-        # Em um sistema real, o DB permitiria consultas mais eficientes.
-        all_mutes = await db.get("mutes")
-        if not all_mutes:
+        member = guild.get_member(user_id)
+        if not member:
+            log.warning(f"Membro {user_id} não encontrado na guild {guild_id} para unmute. Removendo mute do DB.")
             return
 
-        for mute_record in all_mutes:
+        # Tenta remover o timeout
+        if member.timed_out_until:
             try:
-                if mute_record.get('ends_at') and float(mute_record['ends_at']) <= now:
-                    guild_id = int(mute_record['guild_id'])
-                    user_id = int(mute_record['user_id'])
-                    
-                    guild = self.get_guild(guild_id)
-                    if not guild:
-                        log.warning(f"Guild {guild_id} não encontrada para unmute de {user_id}. Removendo mute do DB.")
-                        await db.delete("mutes", {"user_id": mute_record['user_id'], "guild_id": mute_record['guild_id']})
-                        continue
-                    
-                    member = guild.get_member(user_id)
-                    if not member:
-                        log.warning(f"Membro {user_id} não encontrado na guild {guild_id} para unmute. Removendo mute do DB.")
-                        await db.delete("mutes", {"user_id": mute_record['user_id'], "guild_id": mute_record['guild_id']})
-                        continue
-
-                    # Tenta remover o timeout
-                    if member.timed_out_until:
-                        try:
-                            await member.edit(timed_out_until=None, reason="Tempo de espera automático expirado.")
-                            log.info(f"Membro {member.name} ({member.id}) desmutado automaticamente na guild {guild.name} ({guild.id}).")
-                            
-                            # Log no canal de moderação
-                            settings = await db.get_one("guild_settings", {"guild_id": str(guild.id)})
-                            if settings and settings.get("mod_logs_channel_id"):
-                                logs_channel = guild.get_channel(int(settings["mod_logs_channel_id"]))
-                                if logs_channel:
-                                    embed = discord.Embed(
-                                        title="✅ Usuário desmutado automaticamente",
-                                        description=f"**Usuário:** {member.mention} (`{member.id}`)\n"
-                                                    f"**Motivo:** Tempo de espera expirado.",
-                                        color=discord.Color.green(),
-                                        timestamp=datetime.utcnow()
-                                    )
-                                    embed.set_thumbnail(url=member.display_avatar.url)
-                                    await logs_channel.send(embed=embed)
+                await member.edit(timed_out_until=None, reason="Tempo de espera automático expirado.")
+                log.info(f"Membro {member.name} ({member.id}) desmutado automaticamente na guild {guild.name} ({guild.id}).")
+                
+                # Log no canal de moderação (vários mutes vencidos juntos saem na mesma mensagem)
+                embed = discord.Embed(
+                    title="✅ Usuário desmutado automaticamente",
+                    description=f"**Usuário:** {member.mention} (`{member.id}`)\n"
+                                f"**Motivo:** Tempo de espera expirado.",
+                    color=discord.Color.green(),
+                    timestamp=datetime.utcnow()
+                )
+                embed.set_thumbnail(url=member.display_avatar.url)
+                await mod_logs.send(guild, embed)
 
-                        except discord.Forbidden:
-                            log.error(f"Não tenho permissão para desmutar {member.name} ({member.id}) na guild {guild.name} ({guild.id}).")
-                        except Exception as e:
-                            log.error(f"Erro ao desmutar {member.name} ({member.id}) na guild {guild.name} ({guild.id}): {e}")
-
-                    # Remove o registro do banco de dados
-                    await db.delete("mutes", {"user_id": mute_record['user_id'], "guild_id": mute_record['guild_id']})
+            except discord.Forbidden:
+                log.error(f"Não tenho permissão para desmutar {member.name} ({member.id}) na guild {guild.name} ({guild.id}).")
             except Exception as e:
-                log.error(f"Erro na verificação de mute para {mute_record.get('user_id')}: {e}")
-
-    @check_mutes.before_loop
-    async def before_check_mutes(self):
-        await self.wait_until_ready()
+                log.error(f"Erro ao desmutar {member.name} ({member.id}) na guild {guild.name} ({guild.id}): {e}")
 
     async def on_command_error(self, ctx, error):
         if isinstance(error, commands.MissingPermissions):
@@ -0,0 +1 @@
+"""Ferramentas de desenvolvimento (servidor local do DB, benchmarks)"""
@@ -0,0 +1,86 @@
+import argparse
+import gzip
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+from utils.codec import CODECS, DB_GZIP_LEVEL
+
+"""Benchmark dos codecs do DB: custo de encode/decode e bytes trafegados.
+
+Uso:
+    python -m tools.bench_codec --rows 500
+"""
+
+def _snowflake() -> str:
+    return str(random.randrange(10**17, 10**19))
+
+def warn_row(guild_id: str) -> Dict:
+    return {
+        "id": random.randrange(1, 10**6),
+        "guild_id": guild_id,
+        "user_id": _snowflake(),
+        "moderator_id": _snowflake(),
+        "reason": random.choice(["Spam", "Flood no chat geral", "Linguagem ofensiva", "Sem motivo especificado"]),
+        "punishment_level": random.choice([None, 3, 5]),
+        "created_at": (datetime.utcnow() - timedelta(minutes=random.randrange(100000))).isoformat(),
+    }
+
+def mute_row(guild_id: str) -> Dict:
+    return {
+        "id": random.randrange(1, 10**6),
+        "guild_id": guild_id,
+        "user_id": _snowflake(),
+        "ends_at": datetime.utcnow().timestamp() + random.randrange(60, 86400),
+        "created_at": datetime.utcnow().isoformat(),
+    }
+
+def payloads(rows: int) -> Dict[str, Dict]:
+    """Payloads típicos: um insert de warn e respostas de select de `warns`/`mutes`."""
+    guild_id = _snowflake()
+    return {
+        "insert warn": {"action": "insert", "database": "warns", "bot_id": "043a6b5b-a2f1-4812-bd92-dfe68e69f56a", "data": warn_row(guild_id)},
+        f"select warns ({rows})": {"data": [warn_row(guild_id) for _ in range(rows)]},
+        f"select mutes ({rows})": {"data": [mute_row(guild_id) for _ in range(rows)]},
+    }
+
+def measure(func: Callable, min_time: float = 0.2) -> float:
+    """Tempo médio por chamada em microssegundos."""
+    count, started = 0, time.perf_counter()
+    while True:
+        func()
+        count += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            return elapsed / count * 1e6
+
+def run(rows: int) -> List[Dict]:
+    results = []
+    for label, payload in payloads(rows).items():
+        for name, codec_cls in CODECS.items():
+            codec = codec_cls()
+            body = codec.dumps(payload)
+            compressed = gzip.compress(body, compresslevel=DB_GZIP_LEVEL)
+            results.append({
+                "payload": label,
+                "codec": name,
+                "encode_us": measure(lambda: codec.dumps(payload)),
+                "decode_us": measure(lambda: codec.loads(body)),
+                "bytes": len(body),
+                "gzip_bytes": len(compressed),
+                "gzip_us": measure(lambda: gzip.compress(body, compresslevel=DB_GZIP_LEVEL)),
+            })
+    return results
+
+def print_report(results: List[Dict]):
+    print(f"{'payload':<20} {'codec':<7} {'encode µs':>10} {'decode µs':>10} {'bytes':>9} {'gzip bytes':>11} {'gzip µs':>9}")
+    for r in results:
+        print(f"{r['payload']:<20} {r['codec']:<7} {r['encode_us']:>10.1f} {r['decode_us']:>10.1f} {r['bytes']:>9} {r['gzip_bytes']:>11} {r['gzip_us']:>9.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark dos codecs JSON do cliente de banco de dados")
+    parser.add_argument("--rows", type=int, default=200, help="registros nas respostas de select")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    print_report(run(args.rows))
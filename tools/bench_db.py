@@ -0,0 +1,118 @@
+import argparse
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+from utils.database import Database
+from .db_server import LocalDBServer
+
+"""Benchmark do cliente `Database` contra o servidor local (ou outro endpoint).
+
+Uso:
+    python -m tools.bench_db --concurrency 50 --requests 2000
+    python -m tools.bench_db --url http://127.0.0.1:8080 --actions select count
+"""
+
+ACTIONS = ("insert", "select", "count", "update", "delete")
+TABLE = "bench_warns"
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Percentil pelo método nearest-rank (amostras já ordenadas)."""
+    if not samples:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(samples)))
+    return samples[min(rank, len(samples)) - 1]
+
+def _random_row(guilds: int, users: int) -> Dict:
+    return {
+        "guild_id": str(random.randrange(guilds)),
+        "user_id": str(random.randrange(users)),
+        "moderator_id": "0",
+        "reason": "benchmark",
+    }
+
+def _operation(database: Database, action: str, guilds: int, users: int) -> Callable[[], Awaitable]:
+    # Filtros aleatórios para que o single-flight não junte todas as leituras em uma só
+    if action == "insert":
+        return lambda: database.save(TABLE, _random_row(guilds, users), wait=True)
+    if action == "select":
+        return lambda: database.get(TABLE, {"guild_id": str(random.randrange(guilds))}, limit=25)
+    if action == "count":
+        return lambda: database.count(TABLE, {"guild_id": str(random.randrange(guilds)), "user_id": str(random.randrange(users))})
+    if action == "update":
+        return lambda: database.update(TABLE, {"guild_id": str(random.randrange(guilds)), "user_id": str(random.randrange(users))}, {"reason": "updated"})
+    if action == "delete":
+        return lambda: database.delete(TABLE, {"guild_id": str(random.randrange(guilds)), "user_id": str(random.randrange(users))})
+    raise ValueError(f"Ação desconhecida: {action}")
+
+async def run_action(database: Database, action: str, requests: int, concurrency: int, guilds: int, users: int) -> Dict:
+    """Executa `requests` operações de um tipo com no máximo `concurrency` em paralelo."""
+    operation = _operation(database, action, guilds, users)
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            result = await operation()
+            latencies.append(time.perf_counter() - started)
+            if isinstance(result, dict) and "error" in result:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(min(concurrency, requests))])
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "action": action,
+        "requests": requests,
+        "errors": errors,
+        "throughput": requests / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 50) * 1000,
+        "p95": percentile(latencies, 95) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+    }
+
+def print_report(results: List[Dict], concurrency: int):
+    print(f"concorrência: {concurrency}")
+    print(f"{'ação':<8} {'reqs':>7} {'erros':>6} {'ops/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for r in results:
+        print(f"{r['action']:<8} {r['requests']:>7} {r['errors']:>6} {r['throughput']:>10.1f} {r['p50']:>9.2f} {r['p95']:>9.2f} {r['p99']:>9.2f}")
+
+async def main(args: argparse.Namespace):
+    server: Optional[LocalDBServer] = None
+    url = args.url
+    if url is None:
+        server = LocalDBServer(latency=args.latency)
+        url = await server.start()
+
+    database = Database(write_behind=False, replica_path="")
+    database.url = url
+    await database.start()
+    try:
+        # Popula a tabela para que leituras, updates e deletes encontrem registros
+        if args.seed:
+            rows = [_random_row(args.guilds, args.users) for _ in range(args.seed)]
+            await database._call("bulk_insert", TABLE, data=rows)
+        results = []
+        for action in args.actions:
+            results.append(await run_action(database, action, args.requests, args.concurrency, args.guilds, args.users))
+        print_report(results, args.concurrency)
+    finally:
+        await database.close()
+        if server is not None:
+            await server.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do cliente de banco de dados do Verl.ia")
+    parser.add_argument("--url", default=None, help="endpoint a testar (padrão: servidor local em processo)")
+    parser.add_argument("--actions", nargs="+", choices=ACTIONS, default=list(ACTIONS))
+    parser.add_argument("--requests", type=int, default=1000, help="requisições por ação")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1000, help="registros inseridos antes das medições")
+    parser.add_argument("--guilds", type=int, default=50)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0, help="atraso artificial do servidor local, em segundos")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,172 @@
+import argparse
+import asyncio
+import copy
+import itertools
+from typing import Dict, List, Optional, Tuple
+from aiohttp import web
+from utils.codec import get_codec
+from utils.filters import apply_query, matches
+
+"""Servidor local que implementa o protocolo `/database` usado por `utils.database.Database`.
+
+Serve para testes de carga sem depender do endpoint real (VERLIA_DB_ENDPOINT).
+Os dados ficam apenas em memória.
+
+Uso:
+    python -m tools.db_server --port 8080
+    VERLIA_DB_ENDPOINT=http://127.0.0.1:8080 python main.py
+"""
+
+class MemoryBackend:
+    """Tabelas em memória com a mesma semântica de filtros do endpoint real."""
+    def __init__(self):
+        self.tables: Dict[str, List[Dict]] = {}
+        self._ids = itertools.count(1)
+        # Respostas já dadas por chave de idempotência (escritas reenviadas pelo diário do cliente)
+        self._applied: Dict[str, Tuple[int, Dict]] = {}
+
+    def _insert(self, db_name: str, data: Dict) -> Dict:
+        row = dict(data)
+        row.setdefault("id", next(self._ids))
+        self.tables.setdefault(db_name, []).append(row)
+        return row
+
+    def execute(self, payload: Dict) -> Tuple[int, Dict]:
+        """Executa uma requisição do protocolo. Retorna (status HTTP, corpo da resposta)."""
+        action = payload.get("action")
+        db_name = payload.get("database")
+        if not action or not db_name:
+            return 400, {"error": "action and database are required"}
+
+        key = payload.get("idempotency_key")
+        if key is not None and key in self._applied:
+            return self._applied[key]
+        status, body = self._execute(action, db_name, payload)
+        if key is not None and status < 400:
+            self._applied[key] = (status, body)
+        return status, body
+
+    def _execute(self, action: str, db_name: str, payload: Dict) -> Tuple[int, Dict]:
+        data = payload.get("data")
+        filters = payload.get("filters")
+
+        if action == "batch":
+            results = []
+            for op in data or []:
+                _, result = self.execute(op)
+                results.append(result)
+            return 200, {"results": results}
+
+        rows = self.tables.get(db_name, [])
+        if action == "insert":
+            if not isinstance(data, dict):
+                return 400, {"error": "insert requires data"}
+            return 200, {"data": self._insert(db_name, data)}
+        if action == "bulk_insert":
+            if not isinstance(data, list):
+                return 400, {"error": "bulk_insert requires a list"}
+            return 200, {"data": [self._insert(db_name, item) for item in data]}
+        if action == "select":
+            result = apply_query(rows, filters, payload.get("order_by"), payload.get("limit"), payload.get("offset") or 0)
+            return 200, {"data": copy.deepcopy(result)}
+        if action == "count":
+            return 200, {"count": sum(1 for row in rows if matches(row, filters))}
+        if action == "update":
+            if not filters:
+                return 400, {"error": "Update requires filters"}
+            updated = [row for row in rows if matches(row, filters)]
+            for row in updated:
+                row.update(data or {})
+            return 200, {"data": copy.deepcopy(updated)}
+        if action == "delete":
+            if not filters:
+                return 400, {"error": "Delete requires filters"}
+            kept = [row for row in rows if not matches(row, filters)]
+            deleted = len(rows) - len(kept)
+            self.tables[db_name] = kept
+            return 200, {"deleted": deleted}
+        return 400, {"error": f"Unknown action: {action}"}
+
+
+# Respostas a partir deste tamanho são enviadas com gzip se o cliente aceitar
+GZIP_MIN_BYTES = 1024
+
+def create_app(backend: Optional[MemoryBackend] = None, latency: float = 0.0) -> web.Application:
+    """Cria a aplicação aiohttp com a rota `POST /database`.
+
+    `latency` adiciona um atraso fixo (em segundos) a cada requisição, simulando a rede.
+    Aceita corpos com `Content-Encoding: gzip` e comprime respostas grandes.
+    """
+    backend = backend or MemoryBackend()
+    codec = get_codec()
+
+    async def handle(request: web.Request) -> web.Response:
+        try:
+            # O aiohttp já descomprime corpos com Content-Encoding gzip
+            payload = codec.loads(await request.read())
+        except ValueError:
+            return web.json_response({"error": "Invalid JSON"}, status=400)
+        if latency:
+            await asyncio.sleep(latency)
+        status, body = backend.execute(payload)
+        response = web.Response(body=codec.dumps(body), status=status, content_type="application/json")
+        if len(response.body) >= GZIP_MIN_BYTES:
+            response.enable_compression()
+        return response
+
+    app = web.Application()
+    app["backend"] = backend
+    app.router.add_post("/database", handle)
+    return app
+
+
+class LocalDBServer:
+    """Executa o servidor local dentro do processo atual (ex.: em benchmarks).
+
+    Uso:
+        async with LocalDBServer() as server:
+            db.url = server.url
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0):
+        self.host = host
+        self.port = port
+        self.app = create_app(latency=latency)
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def backend(self) -> MemoryBackend:
+        return self.app["backend"]
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> str:
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # Com port=0 o sistema escolhe uma porta livre
+        self.port = self._runner.addresses[0][1]
+        return self.url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "LocalDBServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local do protocolo /database do Verl.ia")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="atraso artificial por requisição, em segundos")
+    args = parser.parse_args()
+    web.run_app(create_app(latency=args.latency), host=args.host, port=args.port)
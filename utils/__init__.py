@@ -1,4 +1,5 @@
 from .database import db
+from .cache import settings_cache
 from .embeds import success, error, warning, info
 
 """Utilitários"""
\ No newline at end of file
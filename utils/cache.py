@@ -0,0 +1,137 @@
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+from .database import db, DB_BACKGROUND_DEADLINE
+
+"""Cache em memória para as configurações das guildas."""
+
+log = logging.getLogger('bot')
+
+# Parâmetros do cache de configurações
+SETTINGS_CACHE_SIZE = int(os.environ.get('SETTINGS_CACHE_SIZE', 2048))
+SETTINGS_CACHE_TTL = float(os.environ.get('SETTINGS_CACHE_TTL', 600))
+SETTINGS_NEGATIVE_TTL = float(os.environ.get('SETTINGS_NEGATIVE_TTL', 60))
+
+_MISSING = object()
+
+class TTLCache:
+    """Cache com expiração por tempo (TTL) e despejo LRU quando atinge o tamanho máximo."""
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """Retorna o valor em cache ou `default` se não existir ou estiver expirado."""
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            # Entradas expiradas ficam até serem despejadas, para `get_stale`
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def get_stale(self, key: Any, default: Any = None) -> Any:
+        """Retorna o valor em cache mesmo que já tenha expirado (fallback quando a origem está indisponível)."""
+        entry = self._data.get(key)
+        return default if entry is None else entry[1]
+
+    def set(self, key: Any, value: Any, ttl: float = None):
+        """Armazena um valor, despejando o item menos usado se o cache estiver cheio."""
+        self._data[key] = (time.monotonic() + (ttl if ttl is not None else self.ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Any):
+        """Remove uma chave do cache."""
+        self._data.pop(key, None)
+
+    def clear(self):
+        """Esvazia o cache."""
+        self._data.clear()
+
+
+class GuildSettingsCache:
+    """Cache read-through na frente de `db` para a tabela guild_settings.
+
+    Após `preload`, as guildas conhecidas são servidas de um snapshot em memória
+    carregado com um único `select`; o cache TTL cobre apenas o que ficou de fora.
+    """
+    def __init__(self, database, maxsize: int = SETTINGS_CACHE_SIZE, ttl: float = SETTINGS_CACHE_TTL, negative_ttl: float = SETTINGS_NEGATIVE_TTL):
+        self.db = database
+        self.negative_ttl = negative_ttl
+        self.preloaded = False
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._snapshot: Dict[str, Optional[Dict]] = {}
+
+    async def preload(self, guild_ids: Iterable[int | str] = ()) -> int:
+        """Carrega toda a tabela guild_settings de uma vez.
+
+        Guildas em `guild_ids` sem configuração ficam registradas como `None`,
+        evitando consultas individuais para elas. Retorna o número de configurações carregadas.
+        """
+        response = await self.db._call("select", "guild_settings", timeout=DB_BACKGROUND_DEADLINE)
+        if not response or "error" in response:
+            log.error(f"Erro ao pré-carregar guild_settings: {response.get('error') if response else 'sem resposta'}")
+            return 0
+        snapshot: Dict[str, Optional[Dict]] = {str(guild_id): None for guild_id in guild_ids}
+        for settings in response.get("data", []):
+            if settings.get("guild_id"):
+                snapshot[str(settings["guild_id"])] = settings
+        self._snapshot = snapshot
+        self._cache.clear()
+        self.preloaded = True
+        return sum(1 for settings in snapshot.values() if settings)
+
+    async def get(self, guild_id: int | str) -> Optional[Dict]:
+        """Obtém as configurações da guilda, consultando o DB apenas em caso de cache miss."""
+        key = str(guild_id)
+        if key in self._snapshot:
+            return self._snapshot[key]
+        settings = self._cache.get(key, _MISSING)
+        if settings is not _MISSING:
+            return settings
+        return await self.refresh(key)
+
+    async def refresh(self, guild_id: int | str) -> Optional[Dict]:
+        """Recarrega do DB as configurações de uma guilda (ex.: ao entrar em uma nova guilda)."""
+        key = str(guild_id)
+        response = await self.db._call("select", "guild_settings", filters={"guild_id": key}, limit=1)
+        if not response or "error" in response:
+            # DB indisponível: serve a última configuração conhecida em vez de tratar a guilda como sem configuração
+            settings = self._cache.get_stale(key)
+            self._cache.set(key, settings, ttl=self.negative_ttl)
+            return settings
+        settings = (response.get("data") or [None])[0]
+        if settings and self.preloaded:
+            self._snapshot[key] = settings
+        else:
+            # Ausência de configuração também é cacheada, mas por menos tempo
+            self._cache.set(key, settings, ttl=None if settings else self.negative_ttl)
+        return settings
+
+    def set(self, guild_id: int | str, settings: Optional[Dict]):
+        """Atualiza as configurações da guilda em memória após uma escrita."""
+        key = str(guild_id)
+        if self.preloaded:
+            self._snapshot[key] = settings
+        else:
+            self._cache.set(key, settings)
+
+    def invalidate(self, guild_id: int | str):
+        """Descarta as configurações da guilda da memória (ex.: ao sair da guilda)."""
+        key = str(guild_id)
+        self._snapshot.pop(key, None)
+        self._cache.invalidate(key)
+
+
+# Instância global do cache de configurações
+settings_cache = GuildSettingsCache(db)
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Set
+
+"""Agrupamento de edições sucessivas de uma mesma mensagem."""
+
+log = logging.getLogger('bot')
+
+# Edições da mesma mensagem dentro desta janela (segundos) viram um único log
+EDIT_LOG_DEBOUNCE = float(os.environ.get('EDIT_LOG_DEBOUNCE', 3.0))
+# Espera máxima desde a primeira edição, mesmo que a mensagem continue sendo editada
+EDIT_LOG_MAX_WAIT = float(os.environ.get('EDIT_LOG_MAX_WAIT', 15.0))
+# Mensagens aguardando o fim da janela; acima disso a mais antiga é registrada na hora
+EDIT_LOG_MAX_PENDING = int(os.environ.get('EDIT_LOG_MAX_PENDING', 1000))
+
+# Versões de uma mensagem: qualquer objeto com `id` e `content` (discord.Message, StoredMessage)
+EditHandler = Callable[[Any, Any, int], Awaitable[None]]
+
+class _PendingEdit:
+    __slots__ = ("first", "last", "count", "started_at", "timer")
+
+    def __init__(self, first: Any, last: Any, started_at: float):
+        self.first = first
+        self.last = last
+        self.count = 1
+        self.started_at = started_at
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class EditCoalescer:
+    """Junta as edições de uma mensagem em um único evento "primeira versão → última versão".
+
+    Cada nova edição reinicia a janela de `window` segundos (limitada a `max_wait` desde
+    a primeira); ao fim dela o `handler` recebe a versão original, a final e o número de edições.
+    """
+    def __init__(self, handler: EditHandler, window: float = EDIT_LOG_DEBOUNCE, max_wait: float = EDIT_LOG_MAX_WAIT, max_pending: int = EDIT_LOG_MAX_PENDING):
+        self._handler = handler
+        self.window = window
+        self.max_wait = max_wait
+        self.max_pending = max_pending
+        self._pending: OrderedDict[int, _PendingEdit] = OrderedDict()
+        # Emissões em andamento (o loop guarda as tarefas apenas por referência fraca)
+        self._tasks: Set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, before: Any, after: Any):
+        """Registra uma edição; o log só é emitido quando a mensagem para de ser editada."""
+        loop = asyncio.get_running_loop()
+        entry = self._pending.get(after.id)
+        if entry is None:
+            if len(self._pending) >= self.max_pending:
+                # Mapa cheio: registra a edição pendente mais antiga imediatamente
+                self._fire(next(iter(self._pending)))
+            entry = self._pending[after.id] = _PendingEdit(before, after, loop.time())
+        else:
+            entry.last = after
+            entry.count += 1
+            entry.timer.cancel()
+        delay = min(self.window, entry.started_at + self.max_wait - loop.time())
+        entry.timer = loop.call_later(max(0.0, delay), self._fire, after.id)
+
+    def _fire(self, message_id: int):
+        entry = self._pending.pop(message_id, None)
+        if entry is None:
+            return
+        entry.timer.cancel()
+        task = asyncio.create_task(self._emit(entry))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _emit(self, entry: _PendingEdit):
+        # Mensagem editada e depois restaurada: nada a registrar
+        if entry.first.content == entry.last.content:
+            return
+        try:
+            await self._handler(entry.first, entry.last, entry.count)
+        except Exception as e:
+            log.error(f"Erro ao registrar edição da mensagem {entry.last.id}: {e}")
+
+    async def flush(self):
+        """Emite imediatamente todas as edições pendentes (ex.: ao descarregar a cog)."""
+        entries = list(self._pending.values())
+        self._pending.clear()
+        for entry in entries:
+            entry.timer.cancel()
+        # Inclui as emissões já disparadas que ainda não terminaram
+        await asyncio.gather(*self._tasks, *(self._emit(entry) for entry in entries))
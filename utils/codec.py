@@ -0,0 +1,57 @@
+import gzip
+import json
+import os
+from typing import Any, Dict
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+"""Codecs JSON usados no tráfego com a API do banco de dados."""
+
+# 'auto' usa orjson quando instalado (está no requirements.txt, mas é opcional); 'json' força a biblioteca padrão
+DB_CODEC = os.environ.get('VERLIA_DB_CODEC', 'auto')
+# Corpos de requisição a partir deste tamanho são enviados com gzip (0 = desativado)
+DB_GZIP_MIN_BYTES = int(os.environ.get('VERLIA_DB_GZIP_MIN_BYTES', 0))
+DB_GZIP_LEVEL = 5
+
+class JsonCodec:
+    """Codec da biblioteca padrão (sem espaços entre separadores)."""
+    name = "json"
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec:
+    """Codec baseado em orjson (bem mais rápido para listas grandes de registros)."""
+    name = "orjson"
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+CODECS: Dict[str, type] = {"json": JsonCodec}
+if orjson is not None:
+    CODECS["orjson"] = OrjsonCodec
+
+def get_codec(name: str = DB_CODEC):
+    """Retorna o codec pelo nome; 'auto' escolhe o mais rápido disponível."""
+    if name == "auto":
+        name = "orjson" if orjson is not None else "json"
+    if name not in CODECS:
+        raise ValueError(f"Codec indisponível: {name} (disponíveis: {', '.join(CODECS)})")
+    return CODECS[name]()
+
+def compress(body: bytes, min_bytes: int = DB_GZIP_MIN_BYTES) -> tuple[bytes, bool]:
+    """Comprime o corpo com gzip se ele atingir `min_bytes`. Retorna (corpo, comprimido)."""
+    if not min_bytes or len(body) < min_bytes:
+        return body, False
+    return gzip.compress(body, compresslevel=DB_GZIP_LEVEL), True
@@ -1,22 +1,355 @@
 import aiohttp
+import asyncio
+import copy
+import json
 import logging
 import os
+import random
+import time
+import uuid
+from collections import Counter
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import AsyncIterator, Dict, List, Any, Optional
+from .codec import compress, get_codec
+from .filters import apply_query
+from .local_store import LocalStore
+from .metrics import SIZE_BUCKETS, metrics
 
 """Verl.ia Database Manager - Auto-configured"""
 
 log = logging.getLogger('bot')
 
+# Parâmetros do pool de conexões HTTP compartilhado
+DB_POOL_LIMIT = int(os.environ.get('VERLIA_DB_POOL_LIMIT', 20))
+DB_KEEPALIVE_TIMEOUT = float(os.environ.get('VERLIA_DB_KEEPALIVE', 60))
+DB_DNS_CACHE_TTL = int(os.environ.get('VERLIA_DB_DNS_TTL', 300))
+DB_CONNECT_TIMEOUT = float(os.environ.get('VERLIA_DB_CONNECT_TIMEOUT', 5))
+DB_TOTAL_TIMEOUT = float(os.environ.get('VERLIA_DB_TIMEOUT', 10))
+
+# Prazo total de uma chamada (todas as tentativas), abaixo dos 3s que o Discord dá a uma interação
+DB_CALL_DEADLINE = float(os.environ.get('VERLIA_DB_DEADLINE', 2.5))
+# Prazo das chamadas em segundo plano (pré-carga, hidratação da réplica, diário, bulk_insert),
+# que ninguém espera e podem trafegar tabelas inteiras; cada tentativa ainda é limitada por DB_TOTAL_TIMEOUT
+DB_BACKGROUND_DEADLINE = float(os.environ.get('VERLIA_DB_BACKGROUND_DEADLINE', 30))
+# Retentativas com backoff exponencial e jitter (apenas para falhas transitórias)
+DB_MAX_RETRIES = int(os.environ.get('VERLIA_DB_RETRIES', 2))
+DB_RETRY_BASE_DELAY = 0.1
+DB_RETRY_MAX_DELAY = 1.0
+# Leituras sem resposta após este tempo disparam uma segunda requisição idêntica (0 = desativado)
+DB_HEDGE_AFTER = float(os.environ.get('VERLIA_DB_HEDGE_AFTER', 0))
+# Circuit breaker: abre após N falhas seguidas e libera uma tentativa a cada cooldown
+DB_BREAKER_THRESHOLD = int(os.environ.get('VERLIA_DB_BREAKER_THRESHOLD', 5))
+DB_BREAKER_COOLDOWN = float(os.environ.get('VERLIA_DB_BREAKER_COOLDOWN', 30))
+
+# Ações de leitura que podem compartilhar uma mesma requisição em andamento
+READ_ACTIONS = frozenset({"select", "count"})
+
+# Modo write-behind: `save` enfileira e um worker grava em lotes
+DB_WRITE_BEHIND = os.environ.get('VERLIA_DB_WRITE_BEHIND', '0') == '1'
+DB_WRITE_BATCH_SIZE = int(os.environ.get('VERLIA_DB_WRITE_BATCH_SIZE', 50))
+DB_WRITE_FLUSH_INTERVAL = float(os.environ.get('VERLIA_DB_WRITE_FLUSH_INTERVAL', 0.5))
+
+# Réplica local em SQLite + diário de escritas (desativada quando o caminho está vazio).
+# O diário entrega cada escrita pelo menos uma vez: após um timeout ou 5xx ela é reenviada com a
+# mesma `idempotency_key`, que o servidor usa para ignorar as que já aplicou (ver tools/db_server.py)
+DB_REPLICA_PATH = os.environ.get('VERLIA_DB_REPLICA_PATH', '')
+DB_REPLICA_TTL = float(os.environ.get('VERLIA_DB_REPLICA_TTL', 300))
+DB_REPLAY_INTERVAL = float(os.environ.get('VERLIA_DB_REPLAY_INTERVAL', 5))
+DB_REPLAY_BATCH_SIZE = 100
+WRITE_ACTIONS = frozenset({"insert", "bulk_insert", "update", "delete"})
+# Ações que podem ser repetidas sem efeito colateral se a primeira tentativa chegou ao servidor
+IDEMPOTENT_ACTIONS = READ_ACTIONS | {"update", "delete"}
+# Status que indicam que o servidor não processou a requisição (seguros para qualquer ação)
+RETRY_ANY_STATUS = frozenset({429, 503})
+
+class DatabaseError(Exception):
+    """Falha de uma requisição ao DB em APIs que não podem devolver um dict de erro (ex.: `iter`)."""
+    pass
+
+def _rejected(response: Optional[Dict]) -> bool:
+    """Indica se o servidor recusou a requisição (4xx), ou seja, ela certamente não foi aplicada.
+
+    Só nesse caso é seguro reenviar as operações de um lote individualmente; após um timeout
+    ou 5xx o lote pode já ter sido gravado.
+    """
+    status = (response or {}).get("status")
+    return status is not None and 400 <= status < 500 and status not in (408, 429)
+
+# Métricas do cliente (ver utils/metrics.py)
+DB_REQUEST_SECONDS = metrics.histogram("verlia_db_request_seconds", "Latência das requisições ao DB.", ("action", "table"))
+DB_REQUESTS_IN_FLIGHT = metrics.gauge("verlia_db_requests_in_flight", "Requisições ao DB em andamento.", ("action",))
+DB_PAYLOAD_BYTES = metrics.histogram("verlia_db_payload_bytes", "Tamanho dos corpos enviados e recebidos.", ("action", "table", "direction"), buckets=SIZE_BUCKETS)
+DB_ERRORS = metrics.counter("verlia_db_errors_total", "Requisições ao DB que falharam, por tipo de erro.", ("action", "table", "kind"))
+DB_RETRIES = metrics.counter("verlia_db_retries_total", "Operações reenviadas: retentativa, requisição hedge ou envio individual após falha de um lote.", ("action", "table", "reason"))
+DB_CIRCUIT_OPEN = metrics.gauge("verlia_db_circuit_open", "1 enquanto o circuit breaker do DB está aberto.")
+DB_COALESCED = metrics.counter("verlia_db_coalesced_total", "Leituras atendidas por uma requisição idêntica já em andamento.", ("action", "table"))
+
+class CircuitBreaker:
+    """Abre após `threshold` falhas seguidas; aberto, libera uma tentativa a cada `cooldown` segundos."""
+    def __init__(self, threshold: int = DB_BREAKER_THRESHOLD, cooldown: float = DB_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+    
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+    
+    def allow(self) -> bool:
+        """Indica se uma requisição pode ser enviada agora."""
+        if self.opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self.opened_at >= self.cooldown:
+            # Tentativa de teste; a próxima só depois de outro cooldown
+            self.opened_at = now
+            return True
+        return False
+    
+    def record_success(self):
+        if self.opened_at is not None:
+            log.info("Circuit breaker do DB fechado: endpoint respondendo novamente.")
+            DB_CIRCUIT_OPEN.set(0)
+        self.failures = 0
+        self.opened_at = None
+    
+    def record_failure(self):
+        self.failures += 1
+        if self.opened_at is None and self.failures >= self.threshold:
+            log.warning(f"Circuit breaker do DB aberto após {self.failures} falhas seguidas.")
+            DB_CIRCUIT_OPEN.set(1)
+        if self.opened_at is not None or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
 class Database:
     """Gerenciador de banco de dados Verl.ia"""
     
-    def __init__(self):
+    def __init__(self, write_behind: bool = DB_WRITE_BEHIND, replica_path: str = DB_REPLICA_PATH):
         self.url = os.environ.get('VERLIA_DB_ENDPOINT', "https://amqhmgatgweklzvcfdiy.supabase.co/functions/v1/bot-webhook")
         self.bot_id = os.environ.get('BOT_ID', '043a6b5b-a2f1-4812-bd92-dfe68e69f56a')
+        self.session: Optional[aiohttp.ClientSession] = None
+        # Leituras em andamento: chave -> (tarefa, [número de chamadores que a aguardam junto])
+        self._inflight: Dict[tuple, tuple] = {}
+        self.write_behind = write_behind
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._pending_writes: Counter = Counter()
+        self.breaker = CircuitBreaker()
+        self.codec = get_codec()
+        self.local: Optional[LocalStore] = LocalStore(replica_path) if replica_path else None
+        self._hydrated: Dict[str, float] = {}
+        self._hydrating: Dict[str, asyncio.Task] = {}
+        self._replay_task: Optional[asyncio.Task] = None
+        self._replay_wakeup = asyncio.Event()
+    
+    async def start(self):
+        """Abre a sessão HTTP compartilhada com keep-alive (chamado no setup_hook)."""
+        if self.session and not self.session.closed:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=DB_POOL_LIMIT,
+            keepalive_timeout=DB_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=DB_DNS_CACHE_TTL,
+        )
+        timeout = aiohttp.ClientTimeout(total=DB_TOTAL_TIMEOUT, connect=DB_CONNECT_TIMEOUT)
+        self.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        if self.write_behind and self._writer_task is None:
+            self._write_queue = asyncio.Queue()
+            self._writer_task = asyncio.create_task(self._write_loop())
+        if self.local is not None and self._replay_task is None:
+            await self.local.open()
+            self._replay_task = asyncio.create_task(self._replay_loop())
+    
+    async def warmup(self):
+        """Abre a primeira conexão (TCP + TLS) para que o primeiro comando não pague o handshake."""
+        await self.start()
+        response = await self._call("count", "guild_settings")
+        if response and "error" in response:
+            log.warning(f"Pré-aquecimento do DB falhou: {response.get('error')}")
+        else:
+            log.info("Conexão com o DB pré-aquecida.")
+    
+    async def close(self):
+        """Grava as escritas pendentes e fecha a sessão HTTP compartilhada (chamado no encerramento do bot)."""
+        if self._writer_task is not None:
+            await self.flush()
+            self._writer_task.cancel()
+            self._writer_task = None
+            self._write_queue = None
+        for task in self._hydrating.values():
+            task.cancel()
+        if self._replay_task is not None:
+            self._replay_task.cancel()
+            self._replay_task = None
+            # Última tentativa de enviar o diário; o que sobrar é reenviado no próximo start
+            await self._replay_pending()
+            await self.local.close()
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
+    
+    async def _call(self, action: str, db_name: str, data: Dict | List[Dict] = None, filters: Dict = None, timeout: float = DB_CALL_DEADLINE, **options) -> Dict | List[Dict]:
+        """Método interno para fazer chamadas à API do banco de dados.
+
+        `options` são campos extras do payload (ex.: `order_by`, `limit`); valores None são ignorados.
+        `timeout` é o prazo total da chamada (ver `_send`).
+        Leituras idênticas e simultâneas compartilham uma única requisição (single-flight).
+        """
+        options = {name: value for name, value in options.items() if value is not None}
+        # Garante que leituras e alterações vejam os saves ainda na fila do write-behind
+        if self._pending_writes[db_name]:
+            await self.flush()
+
+        if action not in READ_ACTIONS:
+            return await self._request(action, db_name, data=data, filters=filters, timeout=timeout, **options)
+
+        key = (action, db_name, json.dumps([filters or {}, options], sort_keys=True, default=str))
+        flight = self._inflight.get(key)
+        if flight is not None:
+            task, followers = flight
+            followers[0] += 1
+            DB_COALESCED.inc(action=action, table=db_name)
+            # Cópia para que um chamador não altere o resultado entregue aos demais
+            return copy.deepcopy(await asyncio.shield(task))
+
+        task = asyncio.ensure_future(self._request(action, db_name, data=data, filters=filters, timeout=timeout, **options))
+        followers = [0]
+        self._inflight[key] = (task, followers)
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        result = await asyncio.shield(task)
+        # Com outros chamadores, o primeiro também recebe uma cópia: ele retoma antes deles
+        # e, se alterasse o objeto compartilhado, mudaria o que os demais copiam
+        return copy.deepcopy(result) if followers[0] else result
+    
+    async def _request(self, action: str, db_name: str, data: Dict | List[Dict] = None, filters: Dict = None, timeout: float = DB_CALL_DEADLINE, **options) -> Dict | List[Dict]:
+        """Executa uma operação, passando pela réplica local quando ela está ativa."""
+        if self.local is None:
+            return await self._send(action, db_name, data=data, filters=filters, timeout=timeout, **options)
+        if action == "batch":
+            results = []
+            for op in data:
+                results.append(await self._request(op["action"], op["database"], data=op.get("data"), filters=op.get("filters")))
+            return {"results": results}
+        if action in READ_ACTIONS:
+            return await self._local_read(action, db_name, filters, timeout=timeout, **options)
+        if action in WRITE_ACTIONS:
+            return await self._local_write(action, db_name, data, filters, **options)
+        return await self._send(action, db_name, data=data, filters=filters, timeout=timeout, **options)
+    
+    async def _local_read(self, action: str, db_name: str, filters: Dict = None, order_by: str = None, limit: int = None, offset: int = None, timeout: float = DB_CALL_DEADLINE) -> Dict:
+        """Responde uma leitura a partir da réplica local, sincronizando a tabela com o servidor se estiver velha.
+
+        A sincronização roda em segundo plano; só a primeira leitura de cada tabela no processo a espera,
+        e no máximo por `timeout` (depois disso responde com o que a réplica tiver).
+        """
+        loop = asyncio.get_running_loop()
+        last = self._hydrated.get(db_name)
+        if (last is None or loop.time() - last >= DB_REPLICA_TTL) and db_name not in self._hydrating:
+            task = self._start_hydration(db_name)
+            if last is None:
+                try:
+                    await asyncio.wait_for(asyncio.shield(task), timeout)
+                except asyncio.TimeoutError:
+                    log.warning(f"Sincronização de '{db_name}' ainda em andamento; respondendo pela réplica local.")
+        rows = await self.local.rows(db_name, filters)
+        if action == "count":
+            return {"count": len(rows)}
+        return {"data": apply_query(rows, order_by=order_by, limit=limit, offset=offset or 0)}
+    
+    def _start_hydration(self, db_name: str) -> asyncio.Task:
+        """Dispara (se ainda não estiver em andamento) a sincronização da tabela em segundo plano."""
+        task = self._hydrating.get(db_name)
+        if task is None:
+            # Registra a tentativa já: com o servidor fora do ar, as leituras seguintes não tentam de novo até o TTL
+            self._hydrated[db_name] = asyncio.get_running_loop().time()
+            task = self._hydrating[db_name] = asyncio.create_task(self._hydrate(db_name))
+            task.add_done_callback(lambda _: self._hydrating.pop(db_name, None))
+        return task
+    
+    async def _hydrate(self, db_name: str):
+        """Substitui a cópia local da tabela pelo conteúdo do servidor."""
+        response = await self._send("select", db_name, timeout=DB_BACKGROUND_DEADLINE)
+        if response and "error" not in response:
+            await self.local.replace_table(db_name, response.get("data", []))
+        else:
+            log.warning(f"Servidor do DB indisponível, respondendo '{db_name}' pela réplica local.")
+    
+    async def _local_write(self, action: str, db_name: str, data: Dict | List[Dict] = None, filters: Dict = None, **options) -> Dict:
+        """Aplica a escrita na réplica local e a registra no diário; o envio ao servidor é feito em segundo plano."""
+        payload = {"data": data, "filters": filters, **options, "idempotency_key": uuid.uuid4().hex}
+        try:
+            await self.local.apply_and_journal(action, db_name, payload)
+        except Exception as e:
+            log.error(f"Erro ao gravar no diário local ({action} {db_name}): {e}")
+            return await self._send(action, db_name, data=data, filters=filters, **options)
+        self._replay_wakeup.set()
+        return {"journaled": True}
+    
+    async def _replay_loop(self):
+        """Reenvia periodicamente ao servidor as escritas pendentes do diário."""
+        while True:
+            try:
+                await asyncio.wait_for(self._replay_wakeup.wait(), DB_REPLAY_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._replay_wakeup.clear()
+            try:
+                await self._replay_pending()
+            except Exception as e:
+                log.error(f"Erro ao reenviar o diário do DB: {e}")
+    
+    async def _replay_pending(self):
+        """Envia as escritas do diário em ordem, parando na primeira falha transitória.
+
+        Uma escrita que pode ter sido aplicada (timeout, 5xx) é reenviada depois com a mesma
+        `idempotency_key`, para que o servidor não a aplique duas vezes.
+        """
+        replayed = set()
+        try:
+            await self._replay_entries(replayed)
+        finally:
+            # Linhas inseridas só na réplica não têm `id` (nem outros campos do servidor) até a próxima sincronização
+            for db_name in replayed:
+                self._start_hydration(db_name)
     
-    async def _call(self, action: str, db_name: str, data: Dict = None, filters: Dict = None) -> Dict | List[Dict]:
-        """Método interno para fazer chamadas à API do banco de dados."""
+    async def _replay_entries(self, replayed: set):
+        while True:
+            entries = await self.local.pending(DB_REPLAY_BATCH_SIZE)
+            if not entries:
+                return
+            if len(entries) > 1:
+                operations = [{k: v for k, v in entry.items() if k != "seq" and v is not None} for entry in entries]
+                response = await self._send("batch", "*", data=operations, timeout=DB_BACKGROUND_DEADLINE)
+                if response and "error" not in response and "results" in response:
+                    for entry in entries:
+                        await self.local.acknowledge(entry["seq"])
+                        replayed.add(entry["database"])
+                    continue
+                if not _rejected(response):
+                    return  # O lote pode ter sido aplicado: é reenviado mais tarde, com as mesmas chaves de idempotência
+            for entry in entries:
+                if len(entries) > 1:
+                    DB_RETRIES.inc(action=entry["action"], table=entry["database"], reason="fallback")
+                options = {k: v for k, v in entry.items() if k not in ("seq", "action", "database", "data", "filters")}
+                response = await self._send(entry["action"], entry["database"], data=entry.get("data"), filters=entry.get("filters"), timeout=DB_BACKGROUND_DEADLINE, **options)
+                if response and "error" in response:
+                    status = response.get("status")
+                    if status is None or status >= 500 or status in (408, 429):
+                        return  # Falha transitória: tenta de novo mais tarde, mantendo a ordem
+                    log.error(f"Escrita do diário rejeitada pelo servidor e descartada ({entry['action']} {entry['database']}): {response['error']}")
+                await self.local.acknowledge(entry["seq"])
+                replayed.add(entry["database"])
+    
+    async def _send(self, action: str, db_name: str, data: Dict | List[Dict] = None, filters: Dict = None, timeout: float = DB_CALL_DEADLINE, **options) -> Dict | List[Dict]:
+        """Envia uma requisição à API do banco de dados.
+
+        A chamada inteira respeita o prazo `timeout` (`DB_CALL_DEADLINE` para chamadas feitas
+        durante uma interação, `DB_BACKGROUND_DEADLINE` para as de segundo plano). Falhas transitórias são repetidas
+        com backoff exponencial e jitter (inserts só quando o servidor certamente não
+        processou a requisição), leituras lentas podem ser duplicadas (hedging) e, com o
+        circuit breaker aberto, a chamada falha imediatamente.
+        """
         payload = {
             "action": action,
             "database": db_name,
@@ -26,40 +359,235 @@ class Database:
             payload["data"] = data
         if filters:
             payload["filters"] = filters
+        payload.update(options)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        idempotent = action in IDEMPOTENT_ACTIONS
+        response = None
+        for attempt in range(DB_MAX_RETRIES + 1):
+            if not self.breaker.allow():
+                DB_ERRORS.inc(action=action, table=db_name, kind="circuit_open")
+                return response or {"error": "DB indisponível (circuit breaker aberto)", "status": None}
+            if attempt:
+                delay = random.uniform(0, min(DB_RETRY_MAX_DELAY, DB_RETRY_BASE_DELAY * 2 ** attempt))
+                if loop.time() + delay >= deadline:
+                    break
+                await asyncio.sleep(delay)
+                DB_RETRIES.inc(action=action, table=db_name, reason="retry")
+
+            try:
+                if action in READ_ACTIONS and DB_HEDGE_AFTER:
+                    result = await self._hedged_post(action, db_name, payload, deadline)
+                else:
+                    result = await asyncio.wait_for(self._post(action, db_name, payload), deadline - loop.time())
+                self.breaker.record_success()
+                return result
+            except aiohttp.ClientResponseError as e:
+                kind, response = str(e.status), {"error": str(e), "status": e.status}
+                transient = e.status >= 500 or e.status in RETRY_ANY_STATUS
+                retry = e.status in RETRY_ANY_STATUS or (transient and idempotent)
+            except aiohttp.ClientConnectorError as e:
+                # A conexão nem foi aberta: repetir é seguro para qualquer ação
+                kind, response, transient, retry = "connection", {"error": str(e)}, True, True
+            except aiohttp.ClientError as e:
+                kind, response, transient, retry = "connection", {"error": str(e)}, True, idempotent
+            except asyncio.TimeoutError:
+                kind, response, transient, retry = "timeout", {"error": f"Prazo de {timeout}s esgotado"}, True, idempotent
+            except Exception as e:
+                kind, response, transient, retry = "unexpected", {"error": str(e)}, False, False
+
+            DB_ERRORS.inc(action=action, table=db_name, kind=kind)
+            if transient:
+                self.breaker.record_failure()
+            else:
+                # O endpoint respondeu (ex.: 4xx): não conta como indisponibilidade
+                self.breaker.record_success()
+            if not retry or attempt == DB_MAX_RETRIES:
+                break
+            log.warning(f"Falha transitória no DB ({action} {db_name}), tentando novamente: {response['error']}")
 
+        log.error(f"Erro de conexão com o DB ({action} {db_name}): {response['error']}")
+        return response
+    
+    async def _hedged_post(self, action: str, db_name: str, payload: Dict, deadline: float) -> Dict:
+        """Envia uma leitura e, se não houver resposta em `DB_HEDGE_AFTER`, uma cópia; vale a primeira que der certo."""
+        loop = asyncio.get_running_loop()
+        first = asyncio.ensure_future(self._post(action, db_name, payload))
+        pending = {first}
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(f"{self.url}/database", json=payload) as response:
-                    response.raise_for_status()
-                    return await response.json()
-        except aiohttp.ClientError as e:
-            log.error(f"Erro de conexão com o DB ({action} {db_name}): {e}")
-            return {"error": str(e)}
-        except Exception as e:
-            log.error(f"Erro inesperado no DB ({action} {db_name}): {e}")
-            return {"error": str(e)}
+            done, pending = await asyncio.wait(pending, timeout=min(DB_HEDGE_AFTER, deadline - loop.time()))
+            if done:
+                return first.result()
+            DB_RETRIES.inc(action=action, table=db_name, reason="hedge")
+            pending.add(asyncio.ensure_future(self._post(action, db_name, payload)))
+            error: BaseException = asyncio.TimeoutError()
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=deadline - loop.time(), return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise asyncio.TimeoutError()
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
     
-    async def save(self, db_name: str, data: Dict) -> Dict:
-        """Salva um novo registro no banco de dados."""
+    async def _post(self, action: str, db_name: str, payload: Dict) -> Dict:
+        """Uma única tentativa HTTP; erros são propagados para `_send`."""
+        if self.session is None or self.session.closed:
+            await self.start()
+        body, compressed = compress(self.codec.dumps(payload))
+        headers = {"Content-Type": "application/json"}
+        if compressed:
+            headers["Content-Encoding"] = "gzip"
+        DB_PAYLOAD_BYTES.observe(len(body), action=action, table=db_name, direction="sent")
+        DB_REQUESTS_IN_FLIGHT.inc(action=action)
+        started = time.perf_counter()
+        try:
+            # Respostas com Content-Encoding gzip são descomprimidas pelo aiohttp
+            async with self.session.post(f"{self.url}/database", data=body, headers=headers) as response:
+                response.raise_for_status()
+                raw = await response.read()
+                DB_PAYLOAD_BYTES.observe(int(response.headers.get("Content-Length", len(raw))), action=action, table=db_name, direction="received")
+                return self.codec.loads(raw)
+        finally:
+            DB_REQUEST_SECONDS.observe(time.perf_counter() - started, action=action, table=db_name)
+            DB_REQUESTS_IN_FLIGHT.dec(action=action)
+
+    async def _write_loop(self):
+        """Worker do write-behind: agrupa os saves enfileirados por tamanho ou intervalo."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._write_queue.get()]
+            deadline = loop.time() + DB_WRITE_FLUSH_INTERVAL
+            while len(batch) < DB_WRITE_BATCH_SIZE:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._write_queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._flush_batch(batch)
+            finally:
+                for _ in batch:
+                    self._write_queue.task_done()
+
+    async def _flush_batch(self, batch: List[tuple]):
+        """Grava um lote de saves com um `bulk_insert` por tabela."""
+        by_table: Dict[str, List[tuple]] = {}
+        for db_name, data, future in batch:
+            by_table.setdefault(db_name, []).append((data, future))
+
+        for db_name, items in by_table.items():
+            response = await self._request("bulk_insert", db_name, data=[data for data, _ in items], timeout=DB_BACKGROUND_DEADLINE)
+            if _rejected(response):
+                # Endpoint sem suporte a bulk_insert: grava item a item
+                log.warning(f"bulk_insert em '{db_name}' falhou, gravando {len(items)} registros individualmente: {response.get('error')}")
+                DB_RETRIES.inc(len(items), action="insert", table=db_name, reason="fallback")
+                results = await asyncio.gather(*[self._request("insert", db_name, data=data) for data, _ in items])
+            elif response and "error" not in response and isinstance(response.get("data"), list) and len(response["data"]) == len(items):
+                # Cada save recebe o próprio registro, no mesmo formato da resposta de um insert
+                results = [{**response, "data": row} for row in response["data"]]
+            else:
+                results = [response] * len(items)
+
+            for (_, future), result in zip(items, results):
+                if result and "error" in result:
+                    log.error(f"Erro ao salvar em '{db_name}': {result.get('error')}")
+                if not future.done():
+                    future.set_result(result)
+            self._pending_writes[db_name] -= len(items)
+
+    async def flush(self):
+        """Aguarda até que todos os saves enfileirados tenham sido gravados."""
+        if self._write_queue is not None:
+            await self._write_queue.join()
+
+    async def save(self, db_name: str, data: Dict, wait: bool = False) -> Dict:
+        """Salva um novo registro no banco de dados.
+
+        No modo write-behind o registro é enfileirado e gravado em lote; use `wait=True`
+        para aguardar a gravação quando a durabilidade for necessária.
+        """
         if "created_at" not in data:
             data["created_at"] = datetime.utcnow().isoformat()
-        response = await self._call("insert", db_name, data=data)
+        if self._write_queue is not None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending_writes[db_name] += 1
+            self._write_queue.put_nowait((db_name, data, future))
+            if not wait:
+                return {"queued": True}
+            response = await future
+        else:
+            response = await self._call("insert", db_name, data=data)
         if response and "error" in response:
             log.error(f"Erro ao salvar em '{db_name}': {response.get('error')}")
             return {"error": response["error"]}
         return response
     
-    async def get(self, db_name: str, filters: Dict = None) -> List[Dict]:
-        """Obtém múltiplos registros do banco de dados."""
-        response = await self._call("select", db_name, filters=filters)
+    async def get(self, db_name: str, filters: Dict = None, order_by: str = None, limit: int = None, offset: int = None) -> List[Dict]:
+        """Obtém múltiplos registros do banco de dados.
+
+        Os filtros aceitam igualdade (`{"guild_id": "1"}`) ou operadores
+        (`lt`, `lte`, `gt`, `gte`, `neq`, `in`), ex.: `{"ends_at": {"lte": now}}`.
+        `order_by` recebe o nome da coluna (prefixo `-` para ordem decrescente).
+        """
+        response = await self._call("select", db_name, filters=filters, order_by=order_by, limit=limit, offset=offset)
         if response and "error" in response:
             log.error(f"Erro ao obter de '{db_name}': {response.get('error')}")
             return []
         return response.get("data", []) if response else []
     
-    async def get_one(self, db_name: str, filters: Dict) -> Optional[Dict]:
+    async def iter(self, db_name: str, filters: Dict = None, page_size: int = 100, order_by: str = "id", raise_errors: bool = False) -> AsyncIterator[Dict]:
+        """Percorre os registros página por página, mantendo apenas uma página em memória.
+
+        Usa paginação por cursor (`order_by > último valor`), que não pula registros
+        se o chamador apagar linhas durante a iteração; `order_by` deve ser uma coluna
+        única (registros com o mesmo valor na divisa entre páginas seriam pulados).
+        Se os registros não tiverem a coluna, cai para paginação por offset.
+
+        Uma página com erro encerra a iteração; com `raise_errors`, levanta `DatabaseError`
+        para que o chamador possa distinguir a falha de uma tabela vazia.
+        """
+        column = order_by.lstrip("-")
+        descending = order_by.startswith("-")
+        page_filters = dict(filters or {})
+        offset = None
+        cursor_used = False
+        while True:
+            response = await self._call("select", db_name, filters=page_filters, order_by=order_by, limit=page_size, offset=offset)
+            if response and "error" in response:
+                log.error(f"Erro ao obter de '{db_name}': {response.get('error')}")
+                if raise_errors:
+                    raise DatabaseError(response["error"])
+                return
+            page = response.get("data", []) if response else []
+            for row in page:
+                yield row
+            if len(page) < page_size:
+                break
+
+            last = page[-1].get(column)
+            condition = page_filters.get(column)
+            if last is None or (condition is not None and not isinstance(condition, dict)):
+                offset = (offset or 0) + len(page)
+            else:
+                page_filters[column] = {**(condition or {}), ("lt" if descending else "gt"): last}
+                cursor_used = True
+
+        # Linhas gravadas só na réplica local ainda não têm a coluna (ex.: `id`) e não passam no filtro do cursor
+        if cursor_used and offset is None and self.local is not None and column not in (filters or {}):
+            async for row in self.iter(db_name, {**(filters or {}), column: None}, page_size, order_by, raise_errors):
+                yield row
+    
+    async def get_one(self, db_name: str, filters: Dict, order_by: str = None) -> Optional[Dict]:
         """Obtém um único registro do banco de dados."""
-        data = await self.get(db_name, filters)
+        data = await self.get(db_name, filters, order_by=order_by, limit=1)
         return data[0] if data else None
     
     async def update(self, db_name: str, filters: Dict, data: Dict) -> Dict:
@@ -72,7 +600,7 @@ class Database:
         return response
     
     async def delete(self, db_name: str, filters: Dict) -> Dict:
-        """Deleta registros do banco de dados."""
+        """Deleta registros do banco de dados (aceita os mesmos operadores de filtro de `get`)."""
         if not filters:
             return {"error": "Delete requires filters"}
         response = await self._call("delete", db_name, filters=filters)
@@ -81,11 +609,92 @@ class Database:
         return response
     
     async def count(self, db_name: str, filters: Dict = None) -> int:
-        """Conta o número de registros no banco de dados."""
+        """Conta o número de registros no banco de dados (aceita os mesmos operadores de filtro de `get`)."""
         response = await self._call("count", db_name, filters=filters)
         if response and "error" in response:
             return 0
         return response.get("count", 0) if response else 0
+    
+    async def batch(self, operations: List[Dict]) -> List[Dict]:
+        """Executa várias operações em uma única requisição (ação `batch`).
+
+        Cada operação é um dict com `action`, `database` e, opcionalmente, `data` e `filters`.
+        Retorna as respostas na mesma ordem das operações.
+        """
+        if not operations:
+            return []
+        if any(self._pending_writes[op["database"]] for op in operations):
+            await self.flush()
+        response = await self._request("batch", "*", data=operations)
+        if response and "error" not in response and "results" in response:
+            return response["results"]
+        if not _rejected(response):
+            # Timeout ou erro do servidor: o lote pode ter sido aplicado, então não é reenviado
+            log.error(f"batch com {len(operations)} operações falhou: {response.get('error') if response else 'sem resposta'}")
+            return [response or {"error": "sem resposta"}] * len(operations)
+
+        # Endpoint sem suporte a batch: executa as operações em sequência
+        log.warning(f"batch com {len(operations)} operações falhou, executando individualmente: {response.get('error') if response else 'sem resposta'}")
+        results = []
+        for op in operations:
+            DB_RETRIES.inc(action=op["action"], table=op["database"], reason="fallback")
+            results.append(await self._call(op["action"], op["database"], data=op.get("data"), filters=op.get("filters")))
+        return results
+    
+    def pipeline(self) -> "Pipeline":
+        """Cria um pipeline para enviar várias operações em uma única requisição."""
+        return Pipeline(self)
+
+
+class Pipeline:
+    """Acumula operações no banco de dados e as envia juntas com `Database.batch`."""
+    
+    def __init__(self, database: Database):
+        self.db = database
+        self.operations: List[Dict] = []
+    
+    def __len__(self) -> int:
+        return len(self.operations)
+    
+    def _add(self, action: str, db_name: str, data: Dict = None, filters: Dict = None) -> "Pipeline":
+        operation = {"action": action, "database": db_name}
+        if data:
+            operation["data"] = data
+        if filters:
+            operation["filters"] = filters
+        self.operations.append(operation)
+        return self
+    
+    def save(self, db_name: str, data: Dict) -> "Pipeline":
+        """Adiciona um insert ao pipeline."""
+        if "created_at" not in data:
+            data["created_at"] = datetime.utcnow().isoformat()
+        return self._add("insert", db_name, data=data)
+    
+    def get(self, db_name: str, filters: Dict = None) -> "Pipeline":
+        """Adiciona um select ao pipeline."""
+        return self._add("select", db_name, filters=filters)
+    
+    def update(self, db_name: str, filters: Dict, data: Dict) -> "Pipeline":
+        """Adiciona um update ao pipeline."""
+        if not filters:
+            raise ValueError("Update requires filters")
+        return self._add("update", db_name, data=data, filters=filters)
+    
+    def delete(self, db_name: str, filters: Dict) -> "Pipeline":
+        """Adiciona um delete ao pipeline."""
+        if not filters:
+            raise ValueError("Delete requires filters")
+        return self._add("delete", db_name, filters=filters)
+    
+    def count(self, db_name: str, filters: Dict = None) -> "Pipeline":
+        """Adiciona um count ao pipeline."""
+        return self._add("count", db_name, filters=filters)
+    
+    async def execute(self) -> List[Dict]:
+        """Envia todas as operações acumuladas e retorna as respostas em ordem."""
+        operations, self.operations = self.operations, []
+        return await self.db.batch(operations)
 
 
 # Instância global do database
@@ -0,0 +1,81 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+"""Semântica dos filtros do banco de dados Verl.ia.
+
+Um filtro é um dict `{coluna: valor}`. O valor pode ser um escalar (igualdade)
+ou um dict de operadores, por exemplo `{"ends_at": {"lte": 1700000000}}` ou
+`{"user_id": {"in": ["1", "2"]}}`. Este módulo aplica a mesma semântica
+localmente (réplica local, servidor de testes).
+"""
+
+# Operadores suportados além da igualdade simples
+FILTER_OPERATORS = frozenset({"eq", "neq", "lt", "lte", "gt", "gte", "in"})
+
+def _compare(left: Any, right: Any) -> int:
+    """Compara dois valores, convertendo para número quando os tipos não são comparáveis."""
+    try:
+        return (left > right) - (left < right)
+    except TypeError:
+        left, right = float(left), float(right)
+        return (left > right) - (left < right)
+
+def _equals(left: Any, right: Any) -> bool:
+    if left == right:
+        return True
+    try:
+        return left is not None and right is not None and _compare(left, right) == 0
+    except (TypeError, ValueError):
+        return False
+
+def _match_operator(value: Any, operator: str, expected: Any) -> bool:
+    if operator == "eq":
+        return _equals(value, expected)
+    if operator == "neq":
+        return not _equals(value, expected)
+    if operator == "in":
+        return any(_equals(value, item) for item in expected)
+    if value is None:
+        return False
+    try:
+        result = _compare(value, expected)
+    except (TypeError, ValueError):
+        return False
+    if operator == "lt":
+        return result < 0
+    if operator == "lte":
+        return result <= 0
+    if operator == "gt":
+        return result > 0
+    if operator == "gte":
+        return result >= 0
+    raise ValueError(f"Operador de filtro desconhecido: {operator}")
+
+def matches(row: Dict, filters: Optional[Dict]) -> bool:
+    """Verifica se um registro satisfaz todos os filtros."""
+    for column, condition in (filters or {}).items():
+        value = row.get(column)
+        if isinstance(condition, dict):
+            if not all(_match_operator(value, operator, expected) for operator, expected in condition.items()):
+                return False
+        elif not _equals(value, condition):
+            return False
+    return True
+
+def apply_query(rows: Iterable[Dict], filters: Optional[Dict] = None, order_by: Optional[str] = None, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+    """Filtra, ordena (`"coluna"` ou `"-coluna"` para decrescente) e pagina uma lista de registros."""
+    result = [row for row in rows if matches(row, filters)]
+    if order_by:
+        column = order_by.lstrip("-")
+        # Registros sem a coluna vão para o final, como NULLS LAST
+        present = [row for row in result if row.get(column) is not None]
+        missing = [row for row in result if row.get(column) is None]
+        try:
+            present.sort(key=lambda row: row[column], reverse=order_by.startswith("-"))
+        except TypeError:
+            present.sort(key=lambda row: float(row[column]), reverse=order_by.startswith("-"))
+        result = present + missing
+    if offset:
+        result = result[offset:]
+    if limit is not None:
+        result = result[:limit]
+    return result
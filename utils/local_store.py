@@ -0,0 +1,172 @@
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from .filters import matches
+
+"""Réplica local (SQLite) do banco Verl.ia e diário de escritas pendentes."""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rows (
+    rowid INTEGER PRIMARY KEY,
+    db_name TEXT NOT NULL,
+    guild_id TEXT,
+    user_id TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS rows_guild ON rows (db_name, guild_id, user_id);
+CREATE TABLE IF NOT EXISTS journal (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    action TEXT NOT NULL,
+    db_name TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+# Colunas copiadas para fora do JSON para que filtros de igualdade usem o índice
+_INDEXED_COLUMNS = ("guild_id", "user_id")
+
+def _column(row: Dict, name: str) -> Optional[str]:
+    value = row.get(name)
+    return None if value is None else str(value)
+
+class LocalStore:
+    """Réplica das tabelas em um arquivo SQLite, com um diário durável de escritas.
+
+    Todas as operações rodam em uma única thread dedicada (a conexão SQLite não é
+    compartilhada entre threads), expostas como corrotinas.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='verlia-sqlite')
+        self._conn: Optional[sqlite3.Connection] = None
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _open(self):
+        if self._conn is not None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    async def open(self):
+        await self._run(self._open)
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    async def close(self):
+        await self._run(self._close)
+
+    # ─── Réplica ───
+
+    def _select(self, db_name: str, filters: Optional[Dict]) -> List[tuple]:
+        sql = "SELECT rowid, data FROM rows WHERE db_name = ?"
+        params: List[Any] = [db_name]
+        for column in _INDEXED_COLUMNS:
+            value = (filters or {}).get(column)
+            if value is not None and not isinstance(value, dict):
+                sql += f" AND {column} = ?"
+                params.append(str(value))
+        result = []
+        for rowid, data in self._conn.execute(sql + " ORDER BY rowid", params):
+            row = json.loads(data)
+            if matches(row, filters):
+                result.append((rowid, row))
+        return result
+
+    def _rows(self, db_name: str, filters: Optional[Dict]) -> List[Dict]:
+        return [row for _, row in self._select(db_name, filters)]
+
+    async def rows(self, db_name: str, filters: Dict = None) -> List[Dict]:
+        """Registros locais da tabela que satisfazem os filtros, na ordem de gravação."""
+        return await self._run(self._rows, db_name, filters)
+
+    def _insert(self, db_name: str, rows: List[Dict]):
+        self._conn.executemany(
+            "INSERT INTO rows (db_name, guild_id, user_id, data) VALUES (?, ?, ?, ?)",
+            [(db_name, _column(row, "guild_id"), _column(row, "user_id"), json.dumps(row, default=str)) for row in rows]
+        )
+
+    def _replace_table(self, db_name: str, rows: List[Dict]) -> bool:
+        with self._conn:
+            if self._pending_count(db_name):
+                return False
+            self._conn.execute("DELETE FROM rows WHERE db_name = ?", (db_name,))
+            self._insert(db_name, rows)
+            return True
+
+    async def replace_table(self, db_name: str, rows: List[Dict]) -> bool:
+        """Substitui a cópia local da tabela pelo conteúdo vindo do servidor.
+
+        Não faz nada (e retorna False) se a tabela tiver escritas pendentes no diário,
+        pois a cópia local é mais recente que a do servidor.
+        """
+        return await self._run(self._replace_table, db_name, rows)
+
+    def _apply(self, action: str, db_name: str, data: Any, filters: Optional[Dict]):
+        if action == "insert":
+            self._insert(db_name, [data])
+        elif action == "bulk_insert":
+            self._insert(db_name, data)
+        elif action == "update":
+            for rowid, row in self._select(db_name, filters):
+                row.update(data)
+                self._conn.execute(
+                    "UPDATE rows SET guild_id = ?, user_id = ?, data = ? WHERE rowid = ?",
+                    (_column(row, "guild_id"), _column(row, "user_id"), json.dumps(row, default=str), rowid)
+                )
+        elif action == "delete":
+            rowids = [(rowid,) for rowid, _ in self._select(db_name, filters)]
+            self._conn.executemany("DELETE FROM rows WHERE rowid = ?", rowids)
+
+    # ─── Diário ───
+
+    def _apply_and_journal(self, action: str, db_name: str, payload: Dict) -> int:
+        with self._conn:
+            self._apply(action, db_name, payload.get("data"), payload.get("filters"))
+            cursor = self._conn.execute(
+                "INSERT INTO journal (action, db_name, payload, created_at) VALUES (?, ?, ?, ?)",
+                (action, db_name, json.dumps(payload, default=str), time.time())
+            )
+            return cursor.lastrowid
+
+    async def apply_and_journal(self, action: str, db_name: str, payload: Dict) -> int:
+        """Aplica uma escrita na réplica e a registra no diário, na mesma transação."""
+        return await self._run(self._apply_and_journal, action, db_name, payload)
+
+    def _pending(self, limit: int) -> List[Dict]:
+        cursor = self._conn.execute("SELECT seq, action, db_name, payload FROM journal ORDER BY seq LIMIT ?", (limit,))
+        return [{"seq": seq, "action": action, "database": db_name, **json.loads(payload)} for seq, action, db_name, payload in cursor]
+
+    async def pending(self, limit: int = 100) -> List[Dict]:
+        """Escritas ainda não confirmadas pelo servidor, na ordem em que foram feitas."""
+        return await self._run(self._pending, limit)
+
+    def _pending_count(self, db_name: Optional[str]) -> int:
+        if db_name is None:
+            return self._conn.execute("SELECT COUNT(*) FROM journal").fetchone()[0]
+        return self._conn.execute("SELECT COUNT(*) FROM journal WHERE db_name = ?", (db_name,)).fetchone()[0]
+
+    async def pending_count(self, db_name: str = None) -> int:
+        return await self._run(self._pending_count, db_name)
+
+    def _acknowledge(self, seq: int):
+        with self._conn:
+            self._conn.execute("DELETE FROM journal WHERE seq = ?", (seq,))
+
+    async def acknowledge(self, seq: int):
+        """Remove do diário uma escrita confirmada pelo servidor."""
+        await self._run(self._acknowledge, seq)
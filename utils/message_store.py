@@ -0,0 +1,103 @@
+import discord
+import os
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Tuple
+
+"""Armazenamento compacto do conteúdo das mensagens recentes, para os logs de edição e exclusão."""
+
+# Orçamento de memória do armazenamento (bytes estimados)
+MESSAGE_STORE_MAX_BYTES = int(os.environ.get('MESSAGE_STORE_MAX_BYTES', 16 * 1024 * 1024))
+# Conteúdo guardado por mensagem (os logs exibem no máximo ~1000 caracteres)
+MESSAGE_STORE_MAX_CONTENT = 1024
+# Custo fixo estimado de um registro (objeto com __slots__, ints, tupla e entrada no OrderedDict)
+RECORD_OVERHEAD = 300
+
+class StoredMessage:
+    """Registro mínimo de uma mensagem: ids, nome do autor, conteúdo (UTF-8, truncado) e URLs dos anexos."""
+    __slots__ = ("id", "guild_id", "channel_id", "author_id", "author_name", "_content", "attachments")
+
+    def __init__(self, id: int, guild_id: int, channel_id: int, author_id: int, author_name: str, content: str, attachments: Tuple[str, ...] = ()):
+        self.id = id
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.author_id = author_id
+        self.author_name = author_name
+        self._content = content[:MESSAGE_STORE_MAX_CONTENT].encode()
+        self.attachments = attachments
+
+    @classmethod
+    def from_message(cls, message: discord.Message) -> "StoredMessage":
+        return cls(
+            message.id,
+            message.guild.id if message.guild else 0,
+            message.channel.id,
+            message.author.id,
+            str(message.author),
+            message.content,
+            tuple(attachment.url for attachment in message.attachments),
+        )
+
+    @property
+    def content(self) -> str:
+        return self._content.decode(errors="ignore")
+
+    @property
+    def created_at(self) -> datetime:
+        return discord.utils.snowflake_time(self.id)
+
+    @property
+    def author_mention(self) -> str:
+        return f"<@{self.author_id}>"
+
+    @property
+    def channel_mention(self) -> str:
+        return f"<#{self.channel_id}>"
+
+    @property
+    def jump_url(self) -> str:
+        return f"https://discord.com/channels/{self.guild_id}/{self.channel_id}/{self.id}"
+
+    def with_content(self, content: str) -> "StoredMessage":
+        """Cópia do registro com outro conteúdo (nova versão de uma mensagem editada)."""
+        return StoredMessage(self.id, self.guild_id, self.channel_id, self.author_id, self.author_name, content, self.attachments)
+
+    def nbytes(self) -> int:
+        """Estimativa do espaço ocupado pelo registro."""
+        return RECORD_OVERHEAD + len(self._content) + len(self.author_name) + sum(len(url) for url in self.attachments)
+
+
+class MessageStore:
+    """Mensagens recentes em ordem LRU, limitadas por um orçamento de bytes em vez de um número de mensagens."""
+    def __init__(self, max_bytes: int = MESSAGE_STORE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._records: OrderedDict[int, StoredMessage] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def add(self, record: StoredMessage):
+        """Guarda (ou substitui) um registro, descartando os menos usados se o orçamento estourar."""
+        self.pop(record.id)
+        self._records[record.id] = record
+        self.nbytes += record.nbytes()
+        while self.nbytes > self.max_bytes and self._records:
+            _, evicted = self._records.popitem(last=False)
+            self.nbytes -= evicted.nbytes()
+
+    def get(self, message_id: int) -> Optional[StoredMessage]:
+        record = self._records.get(message_id)
+        if record is not None:
+            self._records.move_to_end(message_id)
+        return record
+
+    def pop(self, message_id: int) -> Optional[StoredMessage]:
+        record = self._records.pop(message_id, None)
+        if record is not None:
+            self.nbytes -= record.nbytes()
+        return record
+
+
+# Instância global do armazenamento de mensagens
+message_store = MessageStore()
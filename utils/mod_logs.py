@@ -0,0 +1,226 @@
+import asyncio
+import discord
+import io
+import logging
+import os
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+from config import ERROR_COLOR
+from .cache import TTLCache, settings_cache
+from .database import db
+from .message_store import StoredMessage
+
+"""Envio em lote dos logs de moderação."""
+
+log = logging.getLogger('bot')
+
+# Intervalo de agrupamento dos embeds de um mesmo canal (segundos)
+MOD_LOG_FLUSH_INTERVAL = float(os.environ.get('MOD_LOG_FLUSH_INTERVAL', 1.0))
+# Embeds pendentes por canal; acima disso os mais antigos são descartados
+MOD_LOG_MAX_QUEUE = int(os.environ.get('MOD_LOG_MAX_QUEUE', 500))
+# Limites do Discord por mensagem
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+# Espera máxima entre tentativas após um rate limit (429)
+MOD_LOG_MAX_BACKOFF = 60.0
+# Anexa um .txt com o conteúdo das mensagens apagadas em massa (quando estão no cache)
+MOD_LOG_BULK_DELETE_FILE = os.environ.get('MOD_LOG_BULK_DELETE_FILE', '1') == '1'
+# Por quanto tempo mensagens já cobertas por um log agregado ignoram o log individual
+SUPPRESSED_DELETES_TTL = 120.0
+
+# Anexo de um log: (nome do arquivo, conteúdo)
+Attachment = Tuple[str, bytes]
+LogItem = Tuple[discord.Embed, Optional[Attachment]]
+
+class ModLogDispatcher:
+    """Fila de embeds por canal de logs, enviada em mensagens de até 10 embeds.
+
+    `send` apenas enfileira e retorna; um worker por canal agrupa os embeds a cada
+    `flush_interval`, recua em caso de rate limit e termina quando a fila esvazia.
+    Se a guilda tiver `mod_logs_webhook_url`, os lotes saem pelo webhook (bucket de
+    rate limit próprio, fora do bot) usando a sessão HTTP compartilhada do `db`.
+    """
+    def __init__(self, flush_interval: float = MOD_LOG_FLUSH_INTERVAL, max_queue: int = MOD_LOG_MAX_QUEUE):
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self._queues: Dict[int, Deque[LogItem]] = {}
+        self._channels: Dict[int, discord.abc.Messageable] = {}
+        self._workers: Dict[int, asyncio.Task] = {}
+        self._targets: Dict[int, discord.Webhook] = {}
+        self._webhooks: Dict[str, discord.Webhook] = {}
+        self._suppressed = TTLCache(maxsize=10000, ttl=SUPPRESSED_DELETES_TTL)
+
+    def pending(self, channel_id: int = None) -> int:
+        """Número de embeds aguardando envio (em um canal ou no total)."""
+        if channel_id is not None:
+            return len(self._queues.get(channel_id, ()))
+        return sum(len(queue) for queue in self._queues.values())
+
+    def suppress(self, message_ids: Iterable[int]):
+        """Marca mensagens cuja exclusão já foi registrada em um log agregado."""
+        for message_id in message_ids:
+            self._suppressed.set(message_id, True)
+
+    def is_suppressed(self, message_id: int) -> bool:
+        return self._suppressed.get(message_id, False)
+
+    async def send(self, guild: discord.Guild, embed: discord.Embed, attachment: Attachment = None) -> bool:
+        """Enfileira um embed (e um anexo opcional) para o canal de logs de moderação da guilda, se configurado."""
+        settings = await settings_cache.get(guild.id)
+        if not settings or not settings.get("mod_logs_channel_id"):
+            return False
+        channel_id = int(settings["mod_logs_channel_id"])
+        channel = guild.get_channel(channel_id)
+        if not channel or not isinstance(channel, discord.TextChannel):
+            log.warning(f"Canal de logs {channel_id} não é um canal de texto ou não existe na guilda '{guild.name}' ({guild.id}).")
+            return False
+        self.enqueue(channel, embed, webhook=self._webhook(settings.get("mod_logs_webhook_url")), attachment=attachment)
+        return True
+
+    def _webhook(self, url: Optional[str]) -> Optional[discord.Webhook]:
+        """Webhook em cache para a URL, ligado à sessão HTTP atual do `db`."""
+        if not url or db.session is None or db.session.closed:
+            return None
+        webhook = self._webhooks.get(url)
+        if webhook is None or webhook.session is not db.session:
+            webhook = self._webhooks[url] = discord.Webhook.from_url(url, session=db.session)
+        return webhook
+
+    def enqueue(self, channel: discord.abc.Messageable, embed: discord.Embed, webhook: discord.Webhook = None, attachment: Attachment = None):
+        """Adiciona um embed à fila do canal, iniciando o worker do canal se necessário."""
+        queue = self._queues.setdefault(channel.id, deque())
+        if len(queue) >= self.max_queue:
+            queue.popleft()
+            log.warning(f"Fila de logs do canal {channel.id} cheia; descartando o embed mais antigo.")
+        queue.append((embed, attachment))
+        self._channels[channel.id] = channel
+        if webhook is not None:
+            self._targets[channel.id] = webhook
+        else:
+            self._targets.pop(channel.id, None)
+        if channel.id not in self._workers:
+            self._workers[channel.id] = asyncio.create_task(self._worker(channel.id))
+
+    def _take_batch(self, queue: Deque[LogItem]) -> List[LogItem]:
+        """Retira da fila os próximos embeds que cabem em uma mensagem."""
+        batch, chars = [], 0
+        while queue and len(batch) < MAX_EMBEDS_PER_MESSAGE:
+            size = len(queue[0][0])
+            if batch and chars + size > MAX_EMBED_CHARS_PER_MESSAGE:
+                break
+            batch.append(queue.popleft())
+            chars += size
+        return batch
+
+    async def _worker(self, channel_id: int):
+        queue = self._queues[channel_id]
+        backoff = self.flush_interval
+        try:
+            while queue:
+                await asyncio.sleep(self.flush_interval)
+                while queue:
+                    batch = self._take_batch(queue)
+                    retry_after = await self._deliver(channel_id, batch)
+                    if retry_after is None:
+                        backoff = self.flush_interval
+                        continue
+                    # Rate limit: devolve o lote ao início da fila e espera antes de tentar de novo
+                    queue.extendleft(reversed(batch))
+                    if not retry_after:
+                        continue
+                    backoff = min(MOD_LOG_MAX_BACKOFF, max(retry_after, backoff * 2))
+                    log.warning(f"Rate limit ao enviar logs no canal {channel_id}; nova tentativa em {backoff:.1f}s.")
+                    await asyncio.sleep(backoff)
+        finally:
+            self._workers.pop(channel_id, None)
+            if not queue:
+                self._queues.pop(channel_id, None)
+                self._channels.pop(channel_id, None)
+                self._targets.pop(channel_id, None)
+
+    async def _deliver(self, channel_id: int, batch: List[LogItem]) -> Optional[float]:
+        """Envia um lote. Retorna o tempo de espera se o lote deve voltar para a fila (0 = reenviar já), senão None."""
+        channel = self._channels[channel_id]
+        webhook = self._targets.get(channel_id)
+        kwargs = {"embeds": [embed for embed, _ in batch]}
+        # Os arquivos são recriados a cada tentativa, pois o discord.py os fecha após o envio
+        files = [discord.File(io.BytesIO(attachment[1]), filename=attachment[0]) for _, attachment in batch if attachment]
+        if files:
+            kwargs["files"] = files
+        try:
+            await (webhook or channel).send(**kwargs)
+        except discord.NotFound:
+            if webhook is None:
+                log.warning(f"Canal de logs {channel_id} não existe mais; {len(batch)} logs descartados.")
+                return None
+            # Webhook apagado no Discord: volta a enviar pelo canal
+            await self._drop_webhook(channel, webhook)
+            return 0
+        except discord.RateLimited as e:
+            return e.retry_after
+        except discord.Forbidden:
+            log.warning(f"Não tenho permissão para enviar logs no canal '{getattr(channel, 'name', channel.id)}' ({channel.id}); {len(batch)} logs descartados.")
+        except discord.HTTPException as e:
+            if e.status == 429:
+                return self.flush_interval
+            log.error(f"Erro ao enviar {len(batch)} logs no canal {channel.id}: {e}")
+        return None
+
+    async def _drop_webhook(self, channel: discord.abc.GuildChannel, webhook: discord.Webhook):
+        """Esquece um webhook inválido, na memória e em guild_settings."""
+        log.warning(f"Webhook de logs do canal {channel.id} não existe mais; usando o canal diretamente.")
+        self._targets.pop(channel.id, None)
+        self._webhooks = {url: cached for url, cached in self._webhooks.items() if cached.id != webhook.id}
+        settings = await settings_cache.get(channel.guild.id)
+        if settings and settings.get("mod_logs_webhook_url"):
+            settings_cache.set(channel.guild.id, {**settings, "mod_logs_webhook_url": None})
+            await db.update("guild_settings", {"guild_id": str(channel.guild.id)}, {"mod_logs_webhook_url": None})
+
+    async def close(self):
+        """Envia imediatamente tudo o que estiver pendente (chamado no encerramento do bot)."""
+        for task in list(self._workers.values()):
+            task.cancel()
+        for channel_id, queue in list(self._queues.items()):
+            while queue:
+                batch = self._take_batch(queue)
+                if await self._deliver(channel_id, batch) == 0:
+                    await self._deliver(channel_id, batch)
+        self._queues.clear()
+        self._channels.clear()
+        self._targets.clear()
+
+
+def bulk_delete_log(channel: discord.abc.GuildChannel, messages: List[StoredMessage], count: int, moderator: discord.abc.User = None) -> Tuple[discord.Embed, Optional[Attachment]]:
+    """Monta o log agregado de uma exclusão em massa.
+
+    `messages` são os registros das mensagens apagadas que eram conhecidas (podem ser menos que `count`);
+    o conteúdo delas vai em um anexo .txt se `MOD_LOG_BULK_DELETE_FILE` estiver ativo.
+    """
+    description = f"**Canal:** {channel.mention}\n**Mensagens:** `{count}`"
+    if moderator is not None:
+        description += f"\n**Moderador:** {moderator.mention} (`{moderator.id}`)"
+    embed = discord.Embed(title="🗑️ Mensagens Apagadas em Massa", description=description, color=ERROR_COLOR, timestamp=datetime.utcnow())
+
+    authors: Dict[int, int] = {}
+    for message in messages:
+        authors[message.author_id] = authors.get(message.author_id, 0) + 1
+    if authors:
+        top = sorted(authors.items(), key=lambda item: item[1], reverse=True)[:10]
+        embed.add_field(name="Autores", value="\n".join(f"<@{author_id}>: {total}" for author_id, total in top), inline=False)
+    if len(messages) < count:
+        embed.set_footer(text=f"{count - len(messages)} mensagens não estavam em cache; conteúdo indisponível.")
+
+    if not MOD_LOG_BULK_DELETE_FILE or not messages:
+        return embed, None
+    lines = []
+    for message in sorted(messages, key=lambda m: m.id):
+        line = f"[{message.created_at:%Y-%m-%d %H:%M:%S}] {message.author_name} ({message.author_id}): {message.content}"
+        if message.attachments:
+            line += " " + " ".join(message.attachments)
+        lines.append(line)
+    return embed, (f"mensagens-apagadas-{channel.id}.txt", "\n".join(lines).encode())
+
+
+# Instância global do dispatcher de logs de moderação
+mod_logs = ModLogDispatcher()
@@ -0,0 +1,95 @@
+import asyncio
+import heapq
+import itertools
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+"""Agendador de expiração de mutes."""
+
+log = logging.getLogger('bot')
+
+MuteKey = Tuple[str, str]
+
+def _now() -> float:
+    # Mesma base de tempo usada ao gravar `ends_at` nos registros de mute
+    return datetime.utcnow().timestamp()
+
+class MuteScheduler:
+    """Mantém os mutes ativos em um min-heap por `ends_at` e dorme até o próximo vencimento.
+
+    A cada despertar, apenas os registros vencidos são entregues ao `handler`, em lote.
+    Reagendar ou cancelar um mute invalida a entrada antiga do heap (remoção preguiçosa).
+    """
+    def __init__(self, handler: Callable[[List[Dict]], Awaitable[None]]):
+        self._handler = handler
+        self._heap: List[Tuple[float, int, MuteKey]] = []
+        self._records: Dict[MuteKey, Dict] = {}
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def schedule(self, record: Dict):
+        """Agenda (ou reagenda) o fim de um mute a partir do seu registro no DB."""
+        if not record.get("ends_at"):
+            return
+        key = (str(record["guild_id"]), str(record["user_id"]))
+        self._records[key] = record
+        heapq.heappush(self._heap, (float(record["ends_at"]), next(self._counter), key))
+        # Acorda o loop caso este mute vença antes do próximo agendado
+        self._wakeup.set()
+
+    def cancel(self, guild_id: int | str, user_id: int | str):
+        """Cancela o fim agendado de um mute (ex.: /unmute manual)."""
+        self._records.pop((str(guild_id), str(user_id)), None)
+
+    async def load(self, database) -> int:
+        """Carrega todos os mutes ativos do DB. Retorna o número de mutes agendados.
+
+        Pagina por `id` (único; `ends_at` pode se repetir entre mutes). Levanta
+        `DatabaseError` se alguma página falhar; os mutes já lidos continuam agendados
+        e podem ser recarregados com segurança.
+        """
+        async for record in database.iter("mutes", order_by="id", raise_errors=True):
+            self.schedule(record)
+        return len(self._records)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _pop_due(self, now: float) -> List[Dict]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            ends_at, _, key = heapq.heappop(self._heap)
+            record = self._records.get(key)
+            # Ignora entradas canceladas ou substituídas por um reagendamento
+            if record is not None and float(record["ends_at"]) == ends_at:
+                del self._records[key]
+                due.append(record)
+        return due
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            due = self._pop_due(_now())
+            if due:
+                try:
+                    await self._handler(due)
+                except Exception as e:
+                    log.error(f"Erro ao processar {len(due)} mutes expirados: {e}")
+                continue
+
+            timeout = self._heap[0][0] - _now() if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass